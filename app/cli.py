@@ -0,0 +1,86 @@
+"""Comandos de manutenção.
+
+    python -m app.cli migrate [--status]
+    python -m app.cli rebuild-standings [--competition ID]
+    python -m app.cli rebuild-ratings
+    python -m app.cli rebuild-pairs [--competition ID]
+"""
+import argparse
+import sys
+from app.database import SessionLocal
+from app.migrations import MIGRATIONS, pending_migrations, run_migrations
+from app.services import pair_service, rating_service, standings_service
+
+
+def migrate(args):
+    if args.status:
+        pending = {version for version, _, _ in pending_migrations()}
+        for version, name, _ in MIGRATIONS:
+            print(f"{version:>4}  {'pendente ' if version in pending else 'aplicada '} {name}")
+        # código de saída 1 com migrações pendentes (útil no deploy)
+        sys.exit(1 if pending else 0)
+
+    applied = run_migrations()
+    for version, name, _ in applied:
+        print(f"Aplicada {version}: {name}")
+    print("Esquema atualizado" if applied else "Sem migrações pendentes")
+
+
+def rebuild_standings(args):
+    db = SessionLocal()
+    try:
+        total = standings_service.rebuild(db, args.competition)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Classificação recalculada: {total} linhas")
+
+
+def rebuild_ratings(args):
+    db = SessionLocal()
+    try:
+        total = rating_service.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Ratings recalculados: {total} linhas")
+
+
+def rebuild_pairs(args):
+    db = SessionLocal()
+    try:
+        total = pair_service.rebuild(db, args.competition)
+        db.commit()
+    finally:
+        db.close()
+    print(f"Estatísticas de pares recalculadas: {total} linhas")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser("migrate", help="cria/atualiza o esquema da base de dados")
+    migrate_parser.add_argument("--status", action="store_true", help="lista as migrações sem aplicar")
+    migrate_parser.set_defaults(func=migrate)
+
+    rebuild = commands.add_parser("rebuild-standings", help="recalcula a tabela de classificação")
+    rebuild.add_argument("--competition", help="id da competição (por omissão todas)")
+    rebuild.set_defaults(func=rebuild_standings)
+
+    commands.add_parser(
+        "rebuild-ratings", help="recalcula os ratings de todos os jogadores (toda a história)"
+    ).set_defaults(func=rebuild_ratings)
+
+    pairs = commands.add_parser(
+        "rebuild-pairs", help="recalcula as estatísticas de parcerias e confrontos"
+    )
+    pairs.add_argument("--competition", help="id da competição (por omissão todas)")
+    pairs.set_defaults(func=rebuild_pairs)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
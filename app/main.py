@@ -1,17 +1,32 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from app.database import engine, Base
+from app.database import PrimaryAfterWriteMiddleware, dispose_engines, get_engine
+from app.metrics import MetricsMiddleware, instrument_templates
+from app.templating import templates
 from app.routers import (
     home_router,
     competition_router,
     game_day_router,
     player_router,
-    match_router
+    match_router,
+    internal_router,
+    api_router,
+    metrics_router
 )
 
-Base.metadata.create_all(bind=engine)
+# O esquema é criado/atualizado à parte, com `python -m app.cli migrate`.
+@asynccontextmanager
+async def lifespan(app):
+    # pool criado já no worker (depois do fork), antes do primeiro pedido
+    get_engine()
+    yield
+    await dispose_engines()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(PrimaryAfterWriteMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 # Montar a pasta static
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -22,3 +37,8 @@ app.include_router(game_day_router.router)
 app.include_router(match_router.router)
 #app.include_router(game_day_router.router, prefix="/game-days")
 app.include_router(player_router.router)
+app.include_router(internal_router.router)
+app.include_router(api_router.router)
+app.include_router(metrics_router.router)
+
+instrument_templates(templates)
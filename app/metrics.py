@@ -0,0 +1,187 @@
+"""Métricas por rota (latência, nº de queries SQL, tempo na BD, render de templates)
+expostas em /metrics no formato de texto do Prometheus.
+
+SLOW_REQUEST_MS > 0 ativa o registo dos pedidos lentos com as queries mais demoradas.
+"""
+import logging
+import os
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from jinja2 import Template
+from sqlalchemy import event
+
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "0"))
+SLOW_REQUEST_TOP = 5
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+logger = logging.getLogger("app.slow_requests")
+
+
+class _RequestStats:
+    __slots__ = ("queries", "db_time", "template_time", "statements")
+
+    def __init__(self, keep_statements: bool):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.statements = [] if keep_statements else None
+
+
+_current = ContextVar("request_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labels: tuple, buckets: tuple):
+        self.name = name
+        self.doc = doc
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}   # valores das labels -> [contagens por bucket..., soma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            i = bisect_left(self.buckets, value)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+
+        for label_values, values in sorted(series.items()):
+            labels = ",".join(
+                f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values)
+            )
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {values[-1]}')
+            lines.append(f"{self.name}_sum{{{labels}}} {values[-2]}")
+            lines.append(f"{self.name}_count{{{labels}}} {values[-1]}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Duração dos pedidos HTTP",
+    ("method", "route", "status"), LATENCY_BUCKETS
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_sql_queries", "Instruções SQL executadas por pedido",
+    ("method", "route"), QUERY_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Tempo passado na base de dados por pedido",
+    ("method", "route"), LATENCY_BUCKETS
+)
+TEMPLATE_RENDER = Histogram(
+    "template_render_seconds", "Tempo de render dos templates Jinja2",
+    ("template",), LATENCY_BUCKETS
+)
+METRICS = (REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, TEMPLATE_RENDER)
+
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
+
+
+# ---------- SQLAlchemy ----------
+def instrument_engine(engine):
+    """Conta as queries e o tempo na BD do pedido em curso (engine síncrono ou .sync_engine)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is None:
+            return
+        stats.queries += 1
+        stats.db_time += elapsed
+        if stats.statements is not None:
+            stats.statements.append((elapsed, statement))
+
+
+# ---------- Jinja2 ----------
+class _TimedTemplate(Template):
+    def render(self, *args, **kwargs):
+        start = perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            TEMPLATE_RENDER.observe(elapsed, self.name or "<string>")
+            stats = _current.get()
+            if stats is not None:
+                stats.template_time += elapsed
+
+
+def instrument_templates(templates):
+    """Mede o render de todos os templates de uma instância Jinja2Templates"""
+    templates.env.template_class = _TimedTemplate
+
+
+# ---------- Middleware ASGI ----------
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = _RequestStats(keep_statements=SLOW_REQUEST_MS > 0)
+        token = _current.set(stats)
+        status = 500
+        start = perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            _current.reset(token)
+
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            REQUEST_LATENCY.observe(elapsed, method, route, str(status))
+            REQUEST_QUERIES.observe(stats.queries, method, route)
+            REQUEST_DB_TIME.observe(stats.db_time, method, route)
+
+            if SLOW_REQUEST_MS > 0 and elapsed * 1000 >= SLOW_REQUEST_MS:
+                _log_slow_request(method, scope["path"], elapsed, stats)
+
+
+def _log_slow_request(method: str, path: str, elapsed: float, stats: _RequestStats):
+    worst = sorted(stats.statements, key=lambda s: s[0], reverse=True)[:SLOW_REQUEST_TOP]
+    logger.warning(
+        "Pedido lento %s %s: %.0f ms (%d queries, %.0f ms na BD, %.0f ms em templates)%s",
+        method, path, elapsed * 1000, stats.queries, stats.db_time * 1000,
+        stats.template_time * 1000,
+        "".join(f"\n  [{t * 1000:.1f} ms] {sql}" for t, sql in worst)
+    )
@@ -0,0 +1,213 @@
+"""Migrações versionadas do esquema, aplicadas com ``python -m app.cli migrate``
+(antes de arrancar os workers; a aplicação não mexe no esquema ao arrancar).
+
+Cada migração corre na sua transação e fica registada em schema_migrations.
+Para alterar o esquema, acrescentar uma entrada no fim de MIGRATIONS — nunca
+renumerar nem alterar as já publicadas. A primeira cria só as tabelas de
+INITIAL_TABLES (a partir dos modelos atuais); as seguintes criam as suas e devem
+ser idempotentes (verificar antes de criar).
+"""
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.orm import Session
+from app.database import Base, get_engine
+
+# Garantir que todos os modelos estão registados no metadata
+from app.models import competition, game_day, match, player, standing, cache_version, rating, pair_stat  # noqa: F401
+from app.services import pair_service, rating_service, standings_service
+
+
+def migrate_match_players(conn):
+    """Copia as colunas CSV team_a_players/team_b_players para match_players e remove-as"""
+    columns = {c["name"] for c in inspect(conn).get_columns("matches")}
+    if "team_a_players" not in columns:
+        return
+
+    rows = conn.execute(
+        text("SELECT id, team_a_players, team_b_players FROM matches")
+    ).all()
+
+    values = []
+    for match_id, team_a, team_b in rows:
+        for team, csv in (("A", team_a), ("B", team_b)):
+            for player_id in (csv or "").split(","):
+                if player_id:
+                    values.append({"match_id": match_id, "player_id": player_id, "team": team})
+
+    if values:
+        conn.execute(match.MatchPlayer.__table__.insert(), values)
+
+    conn.execute(text("ALTER TABLE matches DROP COLUMN team_a_players"))
+    conn.execute(text("ALTER TABLE matches DROP COLUMN team_b_players"))
+
+
+def migrate_standings(conn, existing_tables):
+    """Preenche competition_standings a partir dos jogos quando a tabela é nova"""
+    if standing.CompetitionStanding.__tablename__ in existing_tables:
+        return
+
+    standings_service.rebuild(Session(bind=conn))
+
+
+def create_missing_indexes(conn):
+    """Cria os índices declarados nos modelos que ainda não existem em tabelas antigas"""
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+
+
+# Tabelas da migração 1; as criadas por migrações seguintes (player_ratings,
+# pair_stats) ficam para essas, que as preenchem a partir dos jogos
+INITIAL_TABLES = [
+    competition.Competition.__table__,
+    player.Player.__table__,
+    game_day.GameDay.__table__,
+    game_day.game_day_players,
+    match.Match.__table__,
+    match.MatchPlayer.__table__,
+    standing.CompetitionStanding.__table__,
+    cache_version.CacheVersion.__table__,
+]
+
+
+def initial_schema(conn):
+    """Esquema a partir dos modelos + migrações feitas antes do versionamento"""
+    if conn.dialect.name == "postgresql":
+        # necessário para o índice trigram de pesquisa de competições
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+    existing_tables = set(inspect(conn).get_table_names())
+    Base.metadata.create_all(bind=conn, tables=INITIAL_TABLES)
+
+    migrate_match_players(conn)
+    create_missing_indexes(conn)
+    migrate_standings(conn, existing_tables)
+
+
+def game_day_players_primary_key(conn):
+    """Chave primária (game_day_id, player_id) em game_day_players, sem as
+    inscrições repetidas, e índices em falta nas chaves estrangeiras"""
+    table = game_day.game_day_players
+    inspector = inspect(conn)
+    if not inspector.get_pk_constraint(table.name)["constrained_columns"]:
+        # ALTER TABLE ... ADD PRIMARY KEY não existe em SQLite: recriar a tabela
+        for index in inspector.get_indexes(table.name):
+            conn.execute(text(f"DROP INDEX {index['name']}"))
+        conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {table.name}_old"))
+        table.create(conn)
+        conn.execute(text(
+            f"INSERT INTO {table.name} (game_day_id, player_id) "
+            f"SELECT DISTINCT game_day_id, player_id FROM {table.name}_old "
+            f"WHERE game_day_id IS NOT NULL AND player_id IS NOT NULL"
+        ))
+        conn.execute(text(f"DROP TABLE {table.name}_old"))
+
+    create_missing_indexes(conn)
+
+
+def _is_empty(conn, table) -> bool:
+    return conn.execute(select(table.c[0]).limit(1)).first() is None
+
+
+def player_ratings(conn):
+    """Tabela de ratings por dia de jogo, calculada a partir de todos os jogos"""
+    table = rating.PlayerRating.__table__
+    table.create(conn, checkfirst=True)
+    create_missing_indexes(conn)
+    # também se a tabela já existia vazia (criada por uma versão anterior da migração 1)
+    if _is_empty(conn, table):
+        rating_service.rebuild(Session(bind=conn))
+
+
+def pair_stats(conn):
+    """Estatísticas de parcerias e confrontos diretos, calculadas a partir dos jogos"""
+    table = pair_stat.PairStat.__table__
+    table.create(conn, checkfirst=True)
+    create_missing_indexes(conn)
+    if _is_empty(conn, table):
+        pair_service.rebuild(Session(bind=conn))
+
+
+def match_version(conn):
+    """Coluna version em matches (controlo de concorrência dos resultados)"""
+    columns = {c["name"] for c in inspect(conn).get_columns("matches")}
+    if "version" not in columns:
+        conn.execute(text("ALTER TABLE matches ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+def match_players_timeline(conn):
+    """Chave cronológica do jogo (data do dia, dia, ronda, campo) em match_players,
+    preenchida para os jogos existentes, e o índice do histórico de cada jogador"""
+    table = match.MatchPlayer.__table__
+    columns = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    quote = conn.dialect.identifier_preparer.quote
+    for name in ("date", "game_day_id", "order", "court"):
+        if name not in columns:
+            column_type = table.c[name].type.compile(conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {quote(name)} {column_type}"))
+
+    matches, days = match.Match.__table__, game_day.GameDay.__table__
+    of_match = lambda column: (
+        select(column)
+        .select_from(matches.outerjoin(days, days.c.id == matches.c.game_day_id))
+        .where(matches.c.id == table.c.match_id)
+        .scalar_subquery()
+    )
+    conn.execute(table.update().where(table.c.date.is_(None)).values(
+        date=of_match(days.c.date),
+        game_day_id=of_match(matches.c.game_day_id),
+        order=of_match(matches.c.order),
+        court=of_match(matches.c.court),
+    ))
+    create_missing_indexes(conn)
+
+
+# (versão, descrição, função(conn))
+MIGRATIONS = [
+    (1, "esquema inicial", initial_schema),
+    (2, "chave primária de game_day_players e índices de jogos/dias", game_day_players_primary_key),
+    (3, "ratings dos jogadores", player_ratings),
+    (4, "estatísticas de pares (parcerias e confrontos)", pair_stats),
+    (5, "versão dos jogos", match_version),
+    (6, "chave cronológica em match_players (histórico dos jogadores)", match_players_timeline),
+]
+
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def applied_versions(bind) -> set[int]:
+    with bind.connect() as conn:
+        if not inspect(conn).has_table(schema_migrations.name):
+            return set()
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending_migrations(bind=None) -> list:
+    bind = bind or get_engine()
+    applied = applied_versions(bind)
+    return [m for m in MIGRATIONS if m[0] not in applied]
+
+
+def run_migrations(bind=None) -> list:
+    """Aplica as migrações em falta, por ordem; devolve as que foram aplicadas"""
+    bind = bind or get_engine()
+    schema_migrations.create(bind, checkfirst=True)
+
+    pending = pending_migrations(bind)
+    for version, name, migrate in pending:
+        with bind.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.now()
+            ))
+    return pending
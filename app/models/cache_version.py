@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, Integer
+from app.database import Base
+
+# Contador de versão por recurso ("competition:<id>", "game_day:<id>", "players"),
+# incrementado a cada escrita que altera páginas em cache (ETag / HTML)
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+
+    key = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
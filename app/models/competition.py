@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Date
+from sqlalchemy import Column, String, Date, Index
 from app.database import Base
 import uuid
 
@@ -10,3 +10,14 @@ class Competition(Base):
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
     status = Column(String, nullable=False, default="Por iniciar")  # novo campo
+
+    __table_args__ = (
+        # paginação por keyset (mais recentes primeiro)
+        Index("ix_competitions_start_date_id", "start_date", "id"),
+        # pesquisa ILIKE '%...%' (trigram em PostgreSQL, índice simples nos restantes)
+        Index(
+            "ix_competitions_name_trgm", "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"}
+        ),
+    )
@@ -1,14 +1,14 @@
-from sqlalchemy import Column, String, Date, ForeignKey, Integer, Table
+from sqlalchemy import Column, String, Date, ForeignKey, Index, Integer, Table
 from sqlalchemy.orm import relationship
 from app.database import Base
 import uuid
 
-# Associação GameDay <-> Player (inscritos)
+# Associação GameDay <-> Player (inscritos; a chave primária impede inscrições repetidas)
 game_day_players = Table(
     'game_day_players',
     Base.metadata,
-    Column('game_day_id', String, ForeignKey('game_days.id')),
-    Column('player_id', String, ForeignKey('players.id'))
+    Column('game_day_id', String, ForeignKey('game_days.id'), primary_key=True),
+    Column('player_id', String, ForeignKey('players.id'), primary_key=True, index=True)
 )
 
 class GameDay(Base):
@@ -20,7 +20,14 @@ class GameDay(Base):
     num_courts = Column(Integer, nullable=False, default=2)  # mínimo 2
 
     #groups = Column(Integer, nullable=False, default=1)  # mínimo 1
-    groups = Column(String, nullable=True)
+    group_name = Column("groups", String, nullable=True)
 
     # Jogadores inscritos
     players = relationship("Player", secondary=game_day_players, backref="game_days")
+
+    __table_args__ = (
+        # dias de uma competição por data (listagens, exports, rankings)
+        Index("ix_game_days_competition_date", "competition_id", "date"),
+        # todos os dias por ordem cronológica (ratings)
+        Index("ix_game_days_date", "date", "id"),
+    )
@@ -1,7 +1,27 @@
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from app.database import Base
 import uuid
 
+# Associação Match <-> Player (equipa "A" ou "B")
+class MatchPlayer(Base):
+    __tablename__ = "match_players"
+
+    match_id = Column(String, ForeignKey("matches.id", ondelete="CASCADE"), primary_key=True)
+    player_id = Column(String, ForeignKey("players.id"), primary_key=True, index=True)
+    team = Column(String(1), nullable=False)  # A ou B
+
+    # cópia da chave cronológica do jogo (data do dia, dia, ronda, campo), que não
+    # muda depois de o jogo ser criado: o histórico de um jogador lê-se pelo índice
+    date = Column(Date)
+    game_day_id = Column(String)
+    order = Column(Integer)
+    court = Column(Integer)
+
+    __table_args__ = (
+        Index("ix_match_players_timeline", "player_id", "date", "game_day_id", "order", "court"),
+    )
+
 class Match(Base):
     __tablename__ = "matches"
 
@@ -12,8 +32,28 @@ class Match(Base):
     scheduled_at = Column(DateTime, nullable=False)
     court = Column(Integer, nullable=False)
 
-    team_a_players = Column(String, nullable=False)  # CSV
-    team_b_players = Column(String, nullable=False)
-
     points_team_a = Column(Integer, nullable=False)
     points_team_b = Column(Integer, nullable=False)
+    # incrementada a cada alteração do resultado (deteção de gravações concorrentes)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # Jogadores das duas equipas (carregados numa query por lote de jogos)
+    team_players = relationship(
+        "MatchPlayer",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin"
+    )
+
+    __table_args__ = (
+        # jogos de um dia já pela ordem de apresentação (ronda, campo)
+        Index("ix_matches_game_day_order_court", "game_day_id", "order", "court"),
+    )
+
+    @property
+    def team_a_ids(self) -> list[str]:
+        return [mp.player_id for mp in self.team_players if mp.team == "A"]
+
+    @property
+    def team_b_ids(self) -> list[str]:
+        return [mp.player_id for mp in self.team_players if mp.team == "B"]
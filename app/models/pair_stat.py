@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, Index
+from app.database import Base
+
+PARTNER = "partner"
+OPPONENT = "opponent"
+
+# Estatísticas de cada par de jogadores numa competição, como parceiros de equipa
+# ou adversários (mantidas incrementalmente, como a classificação). Cada par é
+# guardado nos dois sentidos: (A, B) do ponto de vista de A e (B, A) do de B.
+class PairStat(Base):
+    __tablename__ = "pair_stats"
+
+    competition_id = Column(String, ForeignKey("competitions.id"), primary_key=True)
+    relation = Column(String, primary_key=True)  # PARTNER | OPPONENT
+    player_id = Column(String, ForeignKey("players.id"), primary_key=True)
+    other_id = Column(String, ForeignKey("players.id"), primary_key=True)
+
+    games = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    ties = Column(Integer, nullable=False, default=0)
+    point_diff = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # top-K de uma competição (ORDER BY wins DESC, point_diff DESC LIMIT K)
+        Index("ix_pair_stats_top", "competition_id", "relation", "wins", "point_diff"),
+        # pares de um jogador em todas as competições
+        Index("ix_pair_stats_player", "player_id", "relation", "other_id"),
+    )
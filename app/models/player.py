@@ -7,7 +7,7 @@ class Player(Base):
     __tablename__ = "players"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     sexo = Column(String, nullable=True)   # M ou F
     nivel = Column(String, nullable=True)  # M1, F1, M2, etc.
     data_nascimento = Column(Date, nullable=False)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Integer, Float, Date, ForeignKey, Index
+from app.database import Base
+
+# Rating de cada jogador depois de cada dia de jogo em que jogou
+# (recalculado a partir do dia alterado sempre que os resultados mudam)
+class PlayerRating(Base):
+    __tablename__ = "player_ratings"
+
+    player_id = Column(String, ForeignKey("players.id"), primary_key=True)
+    game_day_id = Column(String, ForeignKey("game_days.id"), primary_key=True)
+    date = Column(Date, nullable=False)  # cópia de GameDay.date, para ordenar sem join
+
+    rating = Column(Float, nullable=False)
+    rd = Column(Float, nullable=False)      # incerteza (rating deviation)
+    games = Column(Integer, nullable=False)  # jogos acumulados até este dia
+
+    __table_args__ = (
+        # último rating de cada jogador antes de um dado dia
+        Index("ix_player_ratings_player_date", "player_id", "date", "game_day_id"),
+        # apagar os ratings a partir de um dia (replay)
+        Index("ix_player_ratings_date", "date", "game_day_id"),
+    )
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, Index
+from app.database import Base
+
+# Classificação acumulada de cada jogador numa competição
+# (mantida incrementalmente a cada alteração de resultados)
+class CompetitionStanding(Base):
+    __tablename__ = "competition_standings"
+
+    competition_id = Column(String, ForeignKey("competitions.id"), primary_key=True)
+    player_id = Column(String, ForeignKey("players.id"), primary_key=True)
+
+    games = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    ties = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    points_for = Column(Integer, nullable=False, default=0)
+    points_against = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_competition_standings_ranking", "competition_id", "points_for"),
+    )
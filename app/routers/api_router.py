@@ -0,0 +1,204 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.database import get_read_db, run_db
+from app.models.competition import Competition
+from app.models.game_day import GameDay
+from app.models.player import Player
+from app.services import competition_service, game_day_service, match_service, pair_service, player_service
+from app.services.ranking_service import COLUMNS, get_game_day_ranking
+from app.services.standings_service import get_ranking
+
+# API JSON (ecrãs de resultados, app móvel). Projeções Core em dicionários,
+# serializadas com orjson; listas longas com paginação por cursor.
+router = APIRouter(prefix="/api/v1", default_response_class=ORJSONResponse)
+
+MAX_LIMIT = 200
+PAIRS_LIMIT = 10
+RELATION = Query("partner", pattern="^(partner|opponent)$")
+
+# Campos de cada listagem, para validar ?fields= mesmo quando a lista vem vazia
+COMPETITION_FIELDS = ("id", "name", "start_date", "end_date", "total_days", "status")
+GAME_DAY_FIELDS = ("id", "date", "num_courts", "group_name", "players", "matches")
+MATCH_FIELDS = ("id", "order", "court", "scheduled_at", "points_team_a", "points_team_b", "team_a", "team_b")
+PLAYER_FIELDS = ("id", "name", "sexo", "nivel", "data_nascimento")
+STANDING_FIELDS = ("player_id", "name", *COLUMNS, "record", "points", "win_rate")
+PAIR_FIELDS = ("player_id", "other_id", "other_name", "games", "wins", "ties", "losses", "point_diff", "win_rate")
+TOP_PAIR_FIELDS = (*PAIR_FIELDS, "player_name")
+HISTORY_FIELDS = (
+    "id", "date", "game_day_id", "competition_id", "competition_name", "group_name", "order", "court",
+    "team", "points_for", "points_against", "rating", "partners", "opponents", "result", "totals",
+)
+
+
+def _fields(fields: str = Query(None, description="Campos a devolver, separados por vírgulas")):
+    return [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+def _project(items, fields, known):
+    """Aplica a seleção de campos (?fields=id,name) a uma lista de dicionários;
+    known são os campos da listagem"""
+    if not fields:
+        return items
+
+    unknown = set(fields) - set(known)
+    if unknown:
+        raise HTTPException(400, f"Campos desconhecidos: {', '.join(sorted(unknown))}")
+    return [{f: item[f] for f in fields} for item in items]
+
+def _page(items, next_cursor, fields, known):
+    return {"items": _project(items, fields, known), "next_cursor": next_cursor}
+
+def _row_or_404(db: Session, query, detail: str):
+    row = db.execute(query).mappings().first()
+    if row is None:
+        raise HTTPException(404, detail)
+    return dict(row)
+
+def _exists_or_404(db: Session, model, id_: str, detail: str):
+    """404 se não existir a linha pai de uma listagem (em vez de uma lista vazia)"""
+    if db.execute(select(model.id).where(model.id == id_)).first() is None:
+        raise HTTPException(404, detail)
+
+
+# ---------- Competições ----------
+@router.get("/competitions")
+async def list_competitions(
+    db: Session = Depends(get_read_db),
+    search: str = Query(None),
+    after: str = Query(None),
+    limit: int = Query(competition_service.PAGE_SIZE, ge=1, le=MAX_LIMIT),
+    fields: list = Depends(_fields)
+):
+    try:
+        items, next_cursor = await run_db(
+            db, competition_service.list_with_days, search, after, limit
+        )
+    except ValueError:
+        raise HTTPException(400, "Cursor inválido")
+    return _page(items, next_cursor, fields, COMPETITION_FIELDS)
+
+@router.get("/competitions/{competition_id}")
+async def get_competition(competition_id: str, db: Session = Depends(get_read_db)):
+    query = select(
+        Competition.id, Competition.name, Competition.start_date,
+        Competition.end_date, Competition.status
+    ).where(Competition.id == competition_id)
+    return await run_db(db, _row_or_404, query, "Competition not found")
+
+@router.get("/competitions/{competition_id}/standings")
+async def competition_standings(
+    competition_id: str,
+    db: Session = Depends(get_read_db),
+    fields: list = Depends(_fields)
+):
+    await run_db(db, _exists_or_404, Competition, competition_id, "Competition not found")
+    items = await run_db(db, get_ranking, competition_id)
+    return {"items": _project(items, fields, STANDING_FIELDS)}
+
+@router.get("/competitions/{competition_id}/game-days")
+async def list_game_days(
+    competition_id: str,
+    db: Session = Depends(get_read_db),
+    fields: list = Depends(_fields)
+):
+    await run_db(db, _exists_or_404, Competition, competition_id, "Competition not found")
+    items = await run_db(db, game_day_service.get_rows, competition_id)
+    return {"items": _project(items, fields, GAME_DAY_FIELDS)}
+
+@router.get("/competitions/{competition_id}/pairs")
+async def competition_pairs(
+    competition_id: str,
+    db: Session = Depends(get_read_db),
+    relation: str = RELATION,
+    limit: int = Query(PAIRS_LIMIT, ge=1, le=MAX_LIMIT),
+    fields: list = Depends(_fields)
+):
+    """Melhores parcerias (relation=partner) ou confrontos diretos (relation=opponent)"""
+    await run_db(db, _exists_or_404, Competition, competition_id, "Competition not found")
+    items = await run_db(db, pair_service.get_top, competition_id, relation, limit)
+    return {"items": _project(items, fields, TOP_PAIR_FIELDS)}
+
+
+# ---------- Dias de jogo ----------
+@router.get("/game-days/{game_day_id}")
+async def get_game_day(game_day_id: str, db: Session = Depends(get_read_db)):
+    query = select(
+        GameDay.id, GameDay.competition_id, GameDay.date,
+        GameDay.num_courts, GameDay.group_name
+    ).where(GameDay.id == game_day_id)
+    return await run_db(db, _row_or_404, query, "Game day not found")
+
+@router.get("/game-days/{game_day_id}/matches")
+async def list_matches(
+    game_day_id: str,
+    db: Session = Depends(get_read_db),
+    fields: list = Depends(_fields)
+):
+    await run_db(db, _exists_or_404, GameDay, game_day_id, "Game day not found")
+    items = await run_db(db, match_service.get_rows, game_day_id)
+    return {"items": _project(items, fields, MATCH_FIELDS)}
+
+@router.get("/game-days/{game_day_id}/standings")
+async def game_day_standings(
+    game_day_id: str,
+    db: Session = Depends(get_read_db),
+    fields: list = Depends(_fields)
+):
+    await run_db(db, _exists_or_404, GameDay, game_day_id, "Game day not found")
+    items = await run_db(db, get_game_day_ranking, game_day_id)
+    return {"items": _project(items, fields, STANDING_FIELDS)}
+
+
+# ---------- Jogadores ----------
+@router.get("/players")
+async def list_players(
+    db: Session = Depends(get_read_db),
+    after: str = Query(None),
+    limit: int = Query(player_service.PAGE_SIZE, ge=1, le=MAX_LIMIT),
+    fields: list = Depends(_fields)
+):
+    try:
+        items, next_cursor = await run_db(db, player_service.get_rows_after, after, limit)
+    except ValueError:
+        raise HTTPException(400, "Cursor inválido")
+    return _page(items, next_cursor, fields, PLAYER_FIELDS)
+
+@router.get("/players/{player_id}")
+async def get_player(player_id: str, db: Session = Depends(get_read_db)):
+    query = select(
+        Player.id, Player.name, Player.sexo, Player.nivel, Player.data_nascimento
+    ).where(Player.id == player_id)
+    return await run_db(db, _row_or_404, query, "Player not found")
+
+@router.get("/players/{player_id}/matches")
+async def player_matches(
+    player_id: str,
+    db: Session = Depends(get_read_db),
+    after: str = Query(None),
+    limit: int = Query(player_service.HISTORY_PAGE_SIZE, ge=1, le=MAX_LIMIT),
+    fields: list = Depends(_fields)
+):
+    """Jogos do jogador, mais recentes primeiro, com os totais acumulados na competição"""
+    await run_db(db, _exists_or_404, Player, player_id, "Player not found")
+    try:
+        items, next_cursor = await run_db(db, player_service.get_history, player_id, after, limit)
+    except ValueError:
+        raise HTTPException(400, "Cursor inválido")
+    return _page(items, next_cursor, fields, HISTORY_FIELDS)
+
+@router.get("/players/{player_id}/pairs")
+async def player_pairs(
+    player_id: str,
+    db: Session = Depends(get_read_db),
+    relation: str = RELATION,
+    competition_id: str = Query(None),
+    limit: int = Query(PAIRS_LIMIT, ge=1, le=MAX_LIMIT),
+    fields: list = Depends(_fields)
+):
+    """Parceiros ou adversários do jogador, somando todas as competições (ou só competition_id)"""
+    await run_db(db, _exists_or_404, Player, player_id, "Player not found")
+    items = await run_db(
+        db, pair_service.get_player_pairs, player_id, relation, limit, competition_id
+    )
+    return {"items": _project(items, fields, PAIR_FIELDS)}
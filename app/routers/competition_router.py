@@ -1,43 +1,43 @@
-from fastapi import APIRouter, Depends, Request, Form, Query
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Depends, Request, Form, Query, HTTPException
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
-from app.services.competition_service import get_all, create
-from fastapi.templating import Jinja2Templates
-from app.services.game_day_service import get_by_competition
+from app.database import get_db, get_read_db, run_db
+from app.services.competition_service import create, get_by_id, list_with_days
+from app.services.standings_service import get_ranking
+from app.services import cache_service, export_service, pair_service
 from app.models.competition import Competition
-from app.models.player import Player
 from app.models.game_day import GameDay
-from app.models.match import Match 
-from sqlalchemy import func
+from app.models.pair_stat import OPPONENT, PARTNER
+from app.templating import templates
 from datetime import datetime
 
 
 router = APIRouter(prefix="/competitions")
-templates = Jinja2Templates(directory="app/templates")
+
+# Pares mostrados nas tabelas de parcerias e confrontos da página de ranking
+PAIRS_TOP = 10
 
 @router.get("/", response_class=HTMLResponse)
-def list_competitions(request: Request, db: Session = Depends(get_db), search: str = Query(None)):
-    competitions = get_all(db)
-    competitions_data = []
-
-    for c in competitions:
-        if search and search.lower() not in c.name.lower():
-            continue
-        # Total de dias de jogo
-        total_days = len(get_by_competition(db, c.id))
-        competitions_data.append({
-            "id": c.id,
-            "name": c.name,
-            "start_date": c.start_date,
-            "end_date": c.end_date,
-            "total_days": total_days,
-            "status": c.status  
-        })
+async def list_competitions(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    search: str = Query(None),
+    after: str = Query(None)
+):
+    try:
+        competitions_data, next_cursor = await run_db(db, list_with_days, search, after)
+    except ValueError:
+        raise HTTPException(400, "Cursor inválido")
 
     return templates.TemplateResponse(
         "competitions.html",
-        {"request": request, "competitions": competitions_data, "search": search or ""}
+        {
+            "request": request,
+            "competitions": competitions_data,
+            "search": search or "",
+            "after": after,
+            "next_cursor": next_cursor
+        }
     )
 
 # Criar novo torneio
@@ -85,117 +85,65 @@ def update_competition(
         competition.start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
         competition.end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
         competition.status = status
+        cache_service.bump_competition(db, competition_id)
         db.commit()
         db.refresh(competition)
     return RedirectResponse("/competitions", status_code=303)
 
 @router.get("/{competition_id}/ranking", response_class=HTMLResponse)
-def competition_ranking(
+async def competition_ranking(
     request: Request,
     competition_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    competition = db.query(Competition).filter(
-        Competition.id == competition_id
-    ).first()
+    versions = await run_db(db, cache_service.get_versions, [
+        cache_service.competition_key(competition_id), cache_service.PLAYERS_KEY
+    ])
+    etag = cache_service.make_etag(request, versions)
+    cached = cache_service.cached_response(request, etag)
+    if cached:
+        return cached
+
+    competition = await run_db(db, get_by_id, competition_id)
 
     if not competition:
         raise HTTPException(404, "Competition not found")
 
-    matches = (
-        db.query(Match)
-        .join(GameDay)
-        .filter(GameDay.competition_id == competition_id)
-        .all()
-    )
-
-    ranking = {}
-
-    def init_player(player: Player):
-        if player.id not in ranking:
-            ranking[player.id] = {
-                "name": player.name,
-                "games": 0,
-                "wins": 0,
-                "ties": 0,
-                "losses": 0,
-                "points_for": 0,
-                "points_against": 0,
-            }
-
-    for match in matches:
-        a_pts = match.points_team_a
-        b_pts = match.points_team_b
-
-        # Resultado
-        if a_pts > b_pts:
-            result_a, result_b = "W", "L"
-        elif a_pts < b_pts:
-            result_a, result_b = "L", "W"
-        else:
-            result_a = result_b = "T"
-
-        # IDs das equipas
-        team_a_ids = match.team_a_players.split(",")
-        team_b_ids = match.team_b_players.split(",")
-
-        team_a_players = db.query(Player).filter(Player.id.in_(team_a_ids)).all()
-        team_b_players = db.query(Player).filter(Player.id.in_(team_b_ids)).all()
-
-        # Equipa A
-        for player in team_a_players:
-            init_player(player)
-            p = ranking[player.id]
-
-            p["games"] += 1
-            p["points_for"] += a_pts
-            p["points_against"] += b_pts
-
-            if result_a == "W":
-                p["wins"] += 1
-            elif result_a == "T":
-                p["ties"] += 1
-            else:
-                p["losses"] += 1
-
-        # Equipa B
-        for player in team_b_players:
-            init_player(player)
-            p = ranking[player.id]
-
-            p["games"] += 1
-            p["points_for"] += b_pts
-            p["points_against"] += a_pts
-
-            if result_b == "W":
-                p["wins"] += 1
-            elif result_b == "T":
-                p["ties"] += 1
-            else:
-                p["losses"] += 1
-
-    # Lista final
-    ranking_list = []
-    for r in ranking.values():
-        games = r["games"]
-        win_rate = (r["wins"] / games * 100) if games > 0 else 0
-
-        ranking_list.append({
-            **r,
-            "points": r["points_for"],
-            "win_rate": round(win_rate, 1),
-        })
-
-    ranking_list.sort(
-        key=lambda x: (x["points"], x["win_rate"]),
-        reverse=True
-    )
+    ranking_list = await run_db(db, get_ranking, competition_id)
+    partners = await run_db(db, pair_service.get_top, competition_id, PARTNER, PAIRS_TOP)
+    opponents = await run_db(db, pair_service.get_top, competition_id, OPPONENT, PAIRS_TOP)
 
-    return templates.TemplateResponse(
+    return cache_service.store_response(etag, templates.TemplateResponse(
         "competition_ranking.html",
         {
             "request": request,
             "competition": competition,
-            "ranking": ranking_list
+            "ranking": ranking_list,
+            "partners": partners,
+            "opponents": opponents
+        }
+    ))
+
+@router.get("/{competition_id}/export")
+def export_competition(
+    competition_id: str,
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    db: Session = Depends(get_db)
+):
+    """Todos os jogos da competição e a classificação, em CSV ou XLSX (streaming)"""
+    competition = get_by_id(db, competition_id)
+    if not competition:
+        raise HTTPException(404, "Competition not found")
+
+    return StreamingResponse(
+        export_service.export(
+            format,
+            lambda db: get_ranking(db, competition_id),
+            GameDay.competition_id == competition_id
+        ),
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="{export_service.filename(competition.name, format)}"'
         }
     )
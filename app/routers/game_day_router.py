@@ -1,25 +1,30 @@
-from fastapi import APIRouter, Depends, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, Request, Form, HTTPException, Query, UploadFile, File
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from app.database import get_db, get_read_db, run_db
 from app.services.game_day_service import (
     get_by_competition, create, add_player, remove_player, replace_player
 )
 from app.services.competition_service import get_by_id as get_competition
+from app.services.player_service import get_roster
 from app.models.player import Player
-from fastapi.templating import Jinja2Templates
 from app.services.game_day_service import get_by_id
+from app.services.match_service import insert_matches, delete_by_game_day
+from app.services.schedule_service import round_robin, mixer, load_history, parse_level
+from app.services.ranking_service import get_game_day_ranking
+from app.services import cache_service, export_service, import_service
+from app.services.live_service import broadcaster
 from datetime import datetime
 from app.models.competition import Competition
 from app.models.game_day import GameDay
 from app.models.match import Match
+from app.templating import templates
 import uuid
 import random
-from collections import defaultdict
 
 
 router = APIRouter(prefix="/game-days")
-templates = Jinja2Templates(directory="app/templates")
 
 @router.post("/delete/{day_id}")
 def delete_game_day(day_id: str, db: Session = Depends(get_db)):
@@ -40,6 +45,7 @@ def delete_game_day(day_id: str, db: Session = Depends(get_db)):
         )
 
     db.delete(day)
+    cache_service.bump(db, cache_service.game_day_key(day_id))
     db.commit()
 
     return RedirectResponse(
@@ -48,11 +54,26 @@ def delete_game_day(day_id: str, db: Session = Depends(get_db)):
     )
 
 @router.get("/{game_day_id}/ranking", response_class=HTMLResponse)
-def game_day_ranking(
+async def game_day_ranking(
     game_day_id: str,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
+    versions = await run_db(db, cache_service.get_versions, [
+        cache_service.game_day_key(game_day_id), cache_service.PLAYERS_KEY
+    ])
+    etag = cache_service.make_etag(request, versions)
+    cached = cache_service.cached_response(request, etag)
+    if cached:
+        return cached
+
+    context = await run_db(db, _game_day_ranking_context, game_day_id)
+    return cache_service.store_response(etag, templates.TemplateResponse(
+        "game_day_ranking.html",
+        {"request": request, **context}
+    ))
+
+def _game_day_ranking_context(db: Session, game_day_id: str):
     game_day = db.query(GameDay).filter(GameDay.id == game_day_id).first()
     if not game_day:
         raise HTTPException(404, "Game day not found")
@@ -61,125 +82,119 @@ def game_day_ranking(
         Competition.id == game_day.competition_id
     ).first()
 
-    matches = db.query(Match).filter(
-        Match.game_day_id == game_day_id
-    ).all()
-
-    ranking = defaultdict(lambda: {
-        "games": 0,
-        "wins": 0,
-        "ties": 0,
-        "losses": 0,
-        "points_for": 0,
-        "points_against": 0,
-    })
-
-    players = {p.id: p for p in db.query(Player).all()}
-
-    for match in matches:
-        a_pts = match.points_team_a
-        b_pts = match.points_team_b
-
-        if a_pts > b_pts:
-            res_a, res_b = "W", "L"
-        elif a_pts < b_pts:
-            res_a, res_b = "L", "W"
-        else:
-            res_a = res_b = "T"
-
-        team_a = match.team_a_players.split(",")
-        team_b = match.team_b_players.split(",")
-
-        for pid in team_a:
-            r = ranking[pid]
-            r["games"] += 1
-            r["points_for"] += a_pts
-            r["points_against"] += b_pts
-            if res_a == "W": r["wins"] += 1
-            elif res_a == "T": r["ties"] += 1
-            else: r["losses"] += 1
-
-        for pid in team_b:
-            r = ranking[pid]
-            r["games"] += 1
-            r["points_for"] += b_pts
-            r["points_against"] += a_pts
-            if res_b == "W": r["wins"] += 1
-            elif res_b == "T": r["ties"] += 1
-            else: r["losses"] += 1
-
-    ranking_list = []
-    for pid, r in ranking.items():
-        games = r["games"]
-        win_rate = (r["wins"] / games * 100) if games else 0
-
-        ranking_list.append({
-            "name": players[pid].name,
-            "games": games,
-            "record": f"{r['wins']} - {r['ties']} - {r['losses']}",
-            "win_rate": round(win_rate, 1),
-            "points": r["points_for"],
-            "points_against": r["points_against"]
-        })
+    return {
+        "competition": competition,
+        "game_day": game_day,
+        "ranking": get_game_day_ranking(db, game_day_id)
+    }
 
-    ranking_list.sort(key=lambda x: (x["points"], x["win_rate"]), reverse=True)
+@router.get("/{game_day_id}/export")
+def export_game_day(
+    game_day_id: str,
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    db: Session = Depends(get_db)
+):
+    """Jogos do dia e a classificação do dia, em CSV ou XLSX (streaming)"""
+    game_day = get_by_id(db, game_day_id)
+    if not game_day:
+        raise HTTPException(404, "Game day not found")
 
-    return templates.TemplateResponse(
-        "game_day_ranking.html",
-        {
-            "request": request,
-            "competition": competition,
-            "game_day": game_day,
-            "ranking": ranking_list
+    title = f"jornada {game_day.date.isoformat()} {game_day.group_name or ''}"
+    return StreamingResponse(
+        export_service.export(
+            format,
+            lambda db: get_game_day_ranking(db, game_day_id),
+            Match.game_day_id == game_day_id
+        ),
+        media_type=export_service.MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="{export_service.filename(title, format)}"'
         }
     )
 
 # Listagem de dias com inscrições
 @router.get("/competition/{competition_id}", response_class=HTMLResponse)
-def list_game_days(
+async def list_game_days(
     request: Request,
     competition_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
+    context = await run_db(db, _game_days_context, competition_id)
+    return templates.TemplateResponse(
+        "game_days.html",
+        {"request": request, **context}
+    )
+
+def _game_days_context(db: Session, competition_id: str):
     competition = db.query(Competition).filter(
         Competition.id == competition_id
     ).first()
 
-    game_days = db.query(GameDay).filter(
+    game_days = db.query(GameDay).options(
+        selectinload(GameDay.players)
+    ).filter(
         GameDay.competition_id == competition_id
     ).order_by(GameDay.date).all()
 
-    all_players = db.query(Player).order_by(Player.name).all()
+    all_players = get_roster(db)
+
+    matches_count = dict(
+        db.query(Match.game_day_id, func.count())
+        .filter(Match.game_day_id.in_([day.id for day in game_days]))
+        .group_by(Match.game_day_id)
+        .all()
+    )
 
     game_days_data = []
     for day in game_days:
         max_players = day.num_courts * 4
         current_players = len(day.players)
 
-        matches_count = db.query(Match).filter(Match.game_day_id == day.id).count()
-
         game_days_data.append({
             "id": day.id,
             "date": day.date,
             "num_courts": day.num_courts,
             "group_name": day.group_name,
             "players": day.players,
+            "player_ids": {p.id for p in day.players},
             "current_players": current_players,
             "max_players": max_players,
-            "has_matches": matches_count > 0   # 👈 chave importante
+            "has_matches": matches_count.get(day.id, 0) > 0   # 👈 chave importante
         })
 
+    return {
+        "competition": competition,
+        "game_days": game_days_data,
+        "all_players": all_players
+    }
+
+# Form para criar dia de jogo com número de campos
+@router.post("/competition/{competition_id}/import", response_class=HTMLResponse)
+def import_matches(
+    request: Request,
+    competition_id: str,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """Importação de jogos históricos (CSV no formato do export)"""
+    if not get_competition(db, competition_id):
+        raise HTTPException(404, "Competition not found")
+
+    result = import_service.import_matches(db, competition_id, import_service.text_lines(file.file))
+    db.commit()
+
     return templates.TemplateResponse(
-        "game_days.html",
+        "import_result.html",
         {
             "request": request,
-            "competition": competition,
-            "game_days": game_days_data,
-            "all_players": all_players
+            "title": "Importação de jogos",
+            "item_label": "jogos",
+            "back_url": f"/game-days/competition/{competition_id}",
+            "result": result
         }
     )
 
-# Form para criar dia de jogo com número de campos
 @router.get("/new/{competition_id}", response_class=HTMLResponse)
 def new_game_day(request: Request, competition_id: str, db: Session = Depends(get_db)):
     competition = db.query(Competition).filter(Competition.id == competition_id).first()
@@ -284,101 +299,138 @@ def update_fields(game_day_id: str, num_courts: int = Form(...), db: Session = D
 
 
 
-@router.post("/{game_day_id}/generate-matches")
-def generate_matches(game_day_id: str, request: Request, db: Session = Depends(get_db)):
-
-    game_day = db.query(GameDay).filter(GameDay.id == game_day_id).first()
-    if not game_day:
-        return templates.TemplateResponse(
-            "matches.html",
-            {
-                "request": request,
-                "error_msg": "Game day not found",
-                "game_day": None,
-                "matches": [],
-                "summary": {},
-                "top3": []
-            }
-        )
+def _resolve_mode(game_day: GameDay, mode: str):
+    """auto: round-robin quando os inscritos enchem exatamente os campos, senão mixer"""
+    if mode in ("round_robin", "mixer"):
+        return mode
+    return "round_robin" if len(game_day.players) == game_day.num_courts * 4 else "mixer"
 
-    players = list(game_day.players)
-    num_players = len(players)
+def _generation_error(db: Session, game_day: GameDay, mode: str):
+    """Mensagem de erro se não for possível gerar jogos para o dia (ou None)"""
+    num_players = len(game_day.players)
     required_players = game_day.num_courts * 4
 
-    if num_players != required_players:
+    if mode == "round_robin" and num_players != required_players:
+        return f"Número de jogadores insuficiente. Esperado: {required_players}, atual: {num_players}"
 
-        competition = db.query(Competition).filter(Competition.id == game_day.competition_id).first()
+    if mode == "mixer" and num_players < 4:
+        return f"Número de jogadores insuficiente. Mínimo: 4, atual: {num_players}"
 
-        return templates.TemplateResponse(
-            "matches.html",
-            {
-                "request": request,
-                "error_msg": f"Número de jogadores insuficiente. Esperado: {required_players}, atual: {num_players}",
-                "game_day": game_day,
-                "competition": competition,
-                "matches": [],
-                "summary": {},
-                "top3": [],
-                "all_players_dict":{}
-            }
+    existing = db.query(Match).filter(Match.game_day_id == game_day.id).count()
+    if existing > 0:
+        return "Já existem jogos gerados para este dia"
 
-        )
+    return None
 
-    existing = db.query(Match).filter(Match.game_day_id == game_day_id).count()
-    if existing > 0:
-        return templates.TemplateResponse(
-            "matches.html",
-            {
-                "request": request,
-                "error_msg": "Já existem jogos gerados para este dia",
-                "game_day": game_day,
-                "matches": [],
-                "summary": {},
-                "top3": []
-            }
-        )
+def _schedule(db: Session, game_day: GameDay, mode: str, seed: int):
+    players = list(game_day.players)
+    player_ids = [p.id for p in players]
+
+    if mode == "round_robin":
+        # 🔁 Round-robin REAL (circle method)
+        return round_robin(player_ids, game_day.num_courts, game_day.date)
+
+    # 🔀 Mixer: evita repetir parcerias/confrontos já jogados na competição
+    partners, opponents = load_history(db, game_day.competition_id)
+    return mixer(
+        player_ids,
+        game_day.num_courts,
+        game_day.date,
+        partners=partners,
+        opponents=opponents,
+        levels={p.id: parse_level(p.nivel) for p in players},
+        seed=seed
+    )
+
+def _generation_error_response(request: Request, db: Session, game_day: GameDay, error_msg: str):
+    competition = None
+    if game_day:
+        competition = db.query(Competition).filter(Competition.id == game_day.competition_id).first()
+
+    return templates.TemplateResponse(
+        "matches.html",
+        {
+            "request": request,
+            "error_msg": error_msg,
+            "game_day": game_day,
+            "competition": competition,
+            "matches": [],
+            "summary": {},
+            "top3": [],
+            "all_players_dict": {}
+        }
+    )
 
-     # 🔁 Round-robin REAL (circle method)
-    fixed = players[-1]
-    rotating = players[:-1]
+@router.get("/{game_day_id}/generate-matches/preview", response_class=HTMLResponse)
+def preview_matches(
+    game_day_id: str,
+    request: Request,
+    mode: str = Query("auto"),
+    seed: int = Query(None),
+    db: Session = Depends(get_db)
+):
+    """Mostra os jogos que seriam gerados, sem gravar nada"""
+    game_day = db.query(GameDay).filter(GameDay.id == game_day_id).first()
+    if not game_day:
+        return _generation_error_response(request, db, None, "Game day not found")
 
-    num_rounds = num_players - 1
-    matches = []
+    mode = _resolve_mode(game_day, mode)
+    error_msg = _generation_error(db, game_day, mode)
+    if error_msg:
+        return _generation_error_response(request, db, game_day, error_msg)
 
-    for round_number in range(1, num_rounds + 1):
+    # a semente vai no formulário para que "Gerar Jogos" grave exatamente esta proposta
+    if seed is None:
+        seed = random.randrange(1_000_000)
 
-        round_players = rotating + [fixed]
+    matches = _schedule(db, game_day, mode, seed)
+    competition = db.query(Competition).filter(Competition.id == game_day.competition_id).first()
 
-        pairs = []
-        for i in range(num_players // 2):
-            pairs.append((
-                round_players[i],
-                round_players[-(i + 1)]
-            ))
+    return templates.TemplateResponse(
+        "matches.html",
+        {
+            "request": request,
+            "preview": True,
+            "mode": mode,
+            "seed": seed,
+            "game_day": game_day,
+            "competition": competition,
+            "matches": matches,
+            "all_players_dict": {p.id: p for p in game_day.players},
+            "summary": {
+                "games": len(matches),
+                "rounds": len(set(m.order for m in matches)),
+                "points": 0,
+                "avg_points": 0
+            },
+            "top3": []
+        }
+    )
 
-        # Agrupar pares em jogos (2 pares = 1 campo)
-        for court_index in range(game_day.num_courts):
-            p1, p2 = pairs[court_index * 2]
-            p3, p4 = pairs[court_index * 2 + 1]
+@router.post("/{game_day_id}/generate-matches")
+def generate_matches(
+    game_day_id: str,
+    request: Request,
+    mode: str = Form("auto"),
+    seed: int = Form(None),
+    db: Session = Depends(get_db)
+):
 
-            match = Match(
-                game_day_id=game_day.id,
-                order=round_number,
-                scheduled_at=datetime.now(),
-                court=court_index + 1,
-                team_a_players=f"{p1.id},{p2.id}",
-                team_b_players=f"{p3.id},{p4.id}",
-                points_team_a=0,
-                points_team_b=0
-            )
+    game_day = db.query(GameDay).filter(GameDay.id == game_day_id).first()
+    if not game_day:
+        return _generation_error_response(request, db, None, "Game day not found")
 
-            db.add(match)
-            matches.append(match)
+    mode = _resolve_mode(game_day, mode)
+    error_msg = _generation_error(db, game_day, mode)
+    if error_msg:
+        return _generation_error_response(request, db, game_day, error_msg)
 
-        # 🔄 rodar jogadores (menos o fixo)
-        rotating = [rotating[-1]] + rotating[:-1]
+    matches = _schedule(db, game_day, mode, seed)
 
+    # Um único INSERT multi-linha (jogos + equipas) na mesma transação
+    insert_matches(db, game_day.id, game_day.competition_id, matches)
     db.commit()
+    broadcaster.publish(game_day_id)
 
     # Redireciona para a página de partidas do dia
     return RedirectResponse(
@@ -389,8 +441,9 @@ def generate_matches(game_day_id: str, request: Request, db: Session = Depends(g
 @router.post("/{game_day_id}/delete-matches")
 def delete_matches(game_day_id: str, db: Session = Depends(get_db)):
 
-    db.query(Match).filter(Match.game_day_id == game_day_id).delete()
+    delete_by_game_day(db, game_day_id)
     db.commit()
+    broadcaster.publish(game_day_id)
 
     return RedirectResponse(
         url=f"/matches/{game_day_id}/matches",
@@ -0,0 +1,47 @@
+import os
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException
+from app import database
+
+# Token exigido no header X-Internal-Token; sem ele definido as rotas /internal
+# ficam desativadas (404), para não expor o estado da base de dados
+INTERNAL_TOKEN = os.environ.get("INTERNAL_TOKEN")
+
+
+def require_token(x_internal_token: str = Header(None)):
+    if not INTERNAL_TOKEN:
+        raise HTTPException(404)
+    if not x_internal_token or not secrets.compare_digest(x_internal_token, INTERNAL_TOKEN):
+        raise HTTPException(403, "Token inválido")
+
+
+router = APIRouter(prefix="/internal", dependencies=[Depends(require_token)])
+
+
+@router.get("/db-pool")
+def db_pool():
+    """Estado dos pools de ligações (para dimensionar DB_POOL_SIZE/DB_MAX_OVERFLOW)"""
+    data = {
+        "config": {
+            "pool_size": database.DB_POOL_SIZE,
+            "max_overflow": database.DB_MAX_OVERFLOW,
+            "pool_timeout": database.DB_POOL_TIMEOUT,
+            "pool_recycle": database.DB_POOL_RECYCLE,
+            "pre_ping": database.DB_POOL_PRE_PING,
+            "statement_timeout_ms": database.DB_STATEMENT_TIMEOUT_MS,
+        },
+        "sync": database.pool_status(database.get_engine()),
+    }
+
+    if database.async_engine is not None:
+        data["async"] = database.pool_status(database.async_engine.sync_engine)
+
+    if database.replica_engine is not None:
+        data["replica"] = {
+            "available": database.replica_available(),
+            "sync": database.pool_status(database.replica_engine),
+        }
+        if database.async_replica_engine is not None:
+            data["replica"]["async"] = database.pool_status(database.async_replica_engine.sync_engine)
+
+    return data
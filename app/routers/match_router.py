@@ -1,38 +1,46 @@
-from fastapi import APIRouter, Depends, Request, Form, HTTPException
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Depends, Request, Form, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_read_db, run_db
 #from app.services.match_service import get_by_game_day
-from fastapi.templating import Jinja2Templates
+from app.services.match_service import update_scores
+from app.services.ranking_service import MatchBatch, compute_standings, rank
 from app.models.match import Match
 from app.models.game_day import GameDay
 from app.models.player import Player
 from app.services.competition_service import get_by_id
-
-from fastapi.responses import StreamingResponse
-import io
+from app.services import cache_service
+from app.services.live_service import broadcaster
+from app.templating import templates
+import orjson
 
 
 router = APIRouter(prefix="/matches")
-templates = Jinja2Templates(directory="app/templates")
+
+def _save_scores(db: Session, game_day_id: str, scores: dict, versions: dict) -> list[str]:
+    conflicts = update_scores(db, game_day_id, scores, versions)
+    db.commit()
+    return conflicts
 
 @router.post("/update-score/{match_id}")
 def update_score(
     match_id: str,
     points_team_a: int = Form(...),
     points_team_b: int = Form(...),
+    version: int = Form(None),
     db: Session = Depends(get_db)
 ):
-    match = db.query(Match).filter(Match.id == match_id).first()
-    if not match:
+    game_day_id = db.query(Match.game_day_id).filter(Match.id == match_id).scalar()
+    if not game_day_id:
         raise HTTPException(404, "Match not found")
 
-    match.points_team_a = points_team_a
-    match.points_team_b = points_team_b
-    db.commit()
+    versions = {match_id: version} if version is not None else {}
+    if _save_scores(db, game_day_id, {match_id: (points_team_a, points_team_b)}, versions):
+        raise HTTPException(409, "O resultado foi alterado entretanto por outra pessoa")
+    broadcaster.publish(game_day_id)
 
     return RedirectResponse(
-        url=f"/matches/{match.game_day_id}/matches",
+        url=f"/matches/{game_day_id}/matches",
         status_code=303
     )
 
@@ -44,19 +52,49 @@ async def save_all_scores(
 ):
     form = await request.form()
 
-    matches = db.query(Match).filter(
-        Match.game_day_id == game_day_id
-    ).all()
-
-    for match in matches:
-        a_key = f"points_team_a_{match.id}"
-        b_key = f"points_team_b_{match.id}"
-
-        if a_key in form and b_key in form:
-            match.points_team_a = int(form[a_key])
-            match.points_team_b = int(form[b_key])
-
-    db.commit()
+    # points_team_a_<id>, points_team_b_<id>, version_<id> (versão lida pelo formulário)
+    # e original_<id> ("A-B" mostrado na página): só os jogos que o utilizador alterou
+    # são gravados, e só esses podem dar conflito
+    scores, versions = {}, {}
+    prefix = "points_team_a_"
+    for key, value in form.items():
+        if not key.startswith(prefix):
+            continue
+        match_id = key[len(prefix):]
+        b_key, version_key = f"points_team_b_{match_id}", f"version_{match_id}"
+        if b_key not in form:
+            continue
+        score = (int(value), int(form[b_key]))
+        original = form.get(f"original_{match_id}")
+        if original is not None and score == tuple(int(p) for p in original.split("-")):
+            continue
+        scores[match_id] = score
+        if version_key in form:
+            versions[match_id] = int(form[version_key])
+
+    conflicts = await run_db(db, _save_scores, game_day_id, scores, versions)
+    broadcaster.publish(game_day_id)
+
+    if conflicts:
+        # os outros jogos foram gravados; estes mostram o valor atual (da outra pessoa)
+        context = await run_db(db, _matches_context, game_day_id)
+        rows = {m.id: m for m in context["matches"]}
+        lost = ", ".join(
+            f"Ronda {rows[mid].order} Campo {rows[mid].court} "
+            f"(o seu resultado: {scores[mid][0]}-{scores[mid][1]})"
+            for mid in sorted(conflicts, key=lambda mid: (rows[mid].order, rows[mid].court))
+        )
+        return templates.TemplateResponse(
+            "matches.html",
+            {
+                "request": request,
+                **context,
+                "conflicts": set(conflicts),
+                "error_msg": f"Estes jogos foram alterados entretanto por outra pessoa e não foram "
+                             f"gravados: {lost}. Os restantes resultados foram gravados."
+            },
+            status_code=409
+        )
 
     return RedirectResponse(
         url=f"/matches/{game_day_id}/matches",
@@ -65,7 +103,73 @@ async def save_all_scores(
 
 
 @router.get("/{game_day_id}/matches")
-def view_matches(game_day_id: str, request: Request, db: Session = Depends(get_db)):
+async def view_matches(game_day_id: str, request: Request, db: Session = Depends(get_read_db)):
+    versions = await run_db(db, cache_service.get_versions, [
+        cache_service.game_day_key(game_day_id), cache_service.PLAYERS_KEY
+    ])
+    etag = cache_service.make_etag(request, versions)
+    cached = cache_service.cached_response(request, etag)
+    if cached:
+        return cached
+
+    context = await run_db(db, _matches_context, game_day_id)
+    return cache_service.store_response(etag, templates.TemplateResponse(
+        "matches.html",
+        {"request": request, **context}
+    ))
+
+# ---------- Resultados em direto (ecrãs junto aos campos) ----------
+@router.get("/{game_day_id}/live")
+async def live_scores(game_day_id: str, request: Request):
+    """Server-Sent Events: estado inicial e depois deltas de resultados/top 3/classificação"""
+    stream = broadcaster.subscribe(game_day_id)
+    try:
+        first = await stream.__anext__()
+    except LookupError:
+        raise HTTPException(404, "Game day not found")
+
+    async def events():
+        message = first
+        try:
+            while True:
+                if message is None:
+                    yield ": ping\n\n"
+                else:
+                    yield b"data: " + orjson.dumps(message) + b"\n\n"
+                if await request.is_disconnected():
+                    break
+                message = await stream.__anext__()
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/{game_day_id}/live")
+async def live_scores_ws(websocket: WebSocket, game_day_id: str):
+    """As mesmas mensagens do SSE, em WebSocket (heartbeat: {"ping": true})"""
+    stream = broadcaster.subscribe(game_day_id)
+    try:
+        first = await stream.__anext__()
+    except LookupError:
+        await websocket.close(code=4404)
+        return
+
+    await websocket.accept()
+    try:
+        message = first
+        while True:
+            await websocket.send_text(orjson.dumps(message or {"ping": True}).decode())
+            message = await stream.__anext__()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await stream.aclose()
+
+def _matches_context(db: Session, game_day_id: str):
     game_day = db.query(GameDay).filter(GameDay.id == game_day_id).first()
     if not game_day:
         raise HTTPException(404, "Game day not found")
@@ -90,27 +194,19 @@ def view_matches(game_day_id: str, request: Request, db: Session = Depends(get_d
     }
 
 # ---------- CALCULAR TOP 3 DO GAME DAY ----------
-    ranking = {}
-    for match in matches:
-        for pid, pts in [(match.team_a_players.split(','), match.points_team_a),
-                         (match.team_b_players.split(','), match.points_team_b)]:
-            for player_id in pid:
-                if player_id not in ranking:
-                    ranking[player_id] = {"name": all_players_dict[player_id].name, "points": 0}
-                ranking[player_id]["points"] += pts
-
-    top3 = sorted(ranking.values(), key=lambda x: x["points"], reverse=True)[:3]
+    top3 = rank(
+        compute_standings(MatchBatch.from_matches(matches)),
+        {pid: p.name for pid, p in all_players_dict.items()},
+        sort_keys=("points",),
+        top=3
+    )
     
 
-    return templates.TemplateResponse(
-        "matches.html",
-        {
-            "request": request,
-            "game_day": game_day,
-            "competition": competition,
-            "matches": matches,
-            "all_players_dict": all_players_dict,
-            "summary": summary,
-            "top3": top3  # <-- enviar para o template
-        }
-    )
\ No newline at end of file
+    return {
+        "game_day": game_day,
+        "competition": competition,
+        "matches": matches,
+        "all_players_dict": all_players_dict,
+        "summary": summary,
+        "top3": top3  # <-- enviar para o template
+    }
\ No newline at end of file
@@ -1,40 +1,29 @@
-from fastapi import APIRouter, Depends, Request, Form, HTTPException
+from fastapi import APIRouter, Depends, Request, Form, HTTPException, Query, UploadFile, File
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from app.database import get_db
-from app.services.player_service import get_all, create, get_by_id, update
-from fastapi.templating import Jinja2Templates
+from app.database import get_db, get_read_db, run_db
+from app.services.player_service import get_page, count_games, has_matches, get_by_id, get_history, invalidate_roster
+from app.services import cache_service, import_service, rating_service
 from app.models.player import Player
-from app.models.match import Match
+from app.templating import templates
 import uuid
 from datetime import datetime
 
 router = APIRouter(prefix="/players")
-templates = Jinja2Templates(directory="app/templates")
 
 # Listagem de jogadores
 @router.get("/", response_class=HTMLResponse)
-def list_players(request: Request, db: Session = Depends(get_db)):
-    players = get_all(db)
-
-    jogos = {p.id: 0 for p in players}
-    matches = db.query(Match).all()
-
-    for m in matches:
-        pida1 = m.team_a_players.split(",")[0]
-        pida2 = m.team_a_players.split(",")[1]
-        pidb1 = m.team_b_players.split(",")[0]
-        pidb2 = m.team_b_players.split(",")[1]
-        jogos[pida1] = jogos[pida1] + 1
-        jogos[pidb1] = jogos[pidb1] + 1
-        jogos[pida2] = jogos[pida2] + 1
-        jogos[pidb2] = jogos[pidb2] + 1
-    #total_games = get_matches(db)
+async def list_players(request: Request, page: int = Query(1, ge=1), db: Session = Depends(get_read_db)):
+    players, pages = await run_db(db, get_page, page)
+    jogos = await run_db(db, count_games, [p.id for p in players])
+    ratings = await run_db(db, rating_service.get_current, [p.id for p in players])
 
     return templates.TemplateResponse(
         "players.html",
-        {"request": request, "players": players, "matches": jogos}
+        {
+            "request": request, "players": players, "matches": jogos, "ratings": ratings,
+            "page": page, "pages": pages
+        }
     )
 
 # Form para criar jogador
@@ -74,8 +63,27 @@ def create_player(request: Request,
     p = Player(id=str(uuid.uuid4()), name=name, sexo=sexo, nivel=nivel, data_nascimento=data_obj)
     db.add(p)
     db.commit()
+    invalidate_roster()
     return RedirectResponse("/players", status_code=303)
 
+@router.post("/import", response_class=HTMLResponse)
+def import_players(request: Request, file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Importação em lote a partir de CSV (Nome;Sexo;Nível;Nascimento)"""
+    result = import_service.import_players(db, import_service.text_lines(file.file))
+    db.commit()
+    invalidate_roster()
+
+    return templates.TemplateResponse(
+        "import_result.html",
+        {
+            "request": request,
+            "title": "Importação de jogadores",
+            "item_label": "jogadores",
+            "back_url": "/players",
+            "result": result
+        }
+    )
+
 # Form para editar jogador
 @router.get("/edit/{player_id}", response_class=HTMLResponse)
 def edit_player(request: Request, player_id: str, db: Session = Depends(get_db)):
@@ -117,7 +125,10 @@ def update_player(request: Request, player_id: str,
         player.nivel = nivel
         player.data_nascimento = datetime.strptime(data_nascimento, "%Y-%m-%d").date()
         
+        # nomes aparecem nos rankings e jogos de todas as competições
+        cache_service.bump(db, cache_service.PLAYERS_KEY)
         db.commit()
+        invalidate_roster()
     
     return RedirectResponse("/players", status_code=303)
 
@@ -129,46 +140,60 @@ def delete_player(request: Request, player_id: str, db: Session = Depends(get_db
         raise HTTPException(status_code=404, detail="Player não encontrado")
 
     # Verificar se existem jogos
-    #matches_count = db.query(Match).filter(
-    #or_(
-    #    Match.team_a_players.like(f"%{player_id}%"),
-    #    Match.team_b_players.like(f"%{player_id}%")
-    #)
-    #).count()
-    
-    matches = db.query(Match).all()
-
-    players = get_all(db)
-
-    jogos = {p.id: 0 for p in players}
-
-    for m in matches:
-        pida1 = m.team_a_players.split(",")[0]
-        pida2 = m.team_a_players.split(",")[1]
-        pidb1 = m.team_b_players.split(",")[0]
-        pidb2 = m.team_b_players.split(",")[1]
-        jogos[pida1] = jogos[pida1] + 1
-        jogos[pidb1] = jogos[pidb1] + 1
-        jogos[pida2] = jogos[pida2] + 1
-        jogos[pidb2] = jogos[pidb2] + 1
+    if has_matches(db, player_id):
+        players, pages = get_page(db)
+        jogos = count_games(db, [p.id for p in players])
+        ratings = rating_service.get_current(db, [p.id for p in players])
 
-    has_matches = jogos[player_id] > 0
-    
-    if has_matches:
-        
         # Retorna o template com mensagem de aviso
         context = {
             "request": request,
             "players": players,
             "matches": jogos,
+            "ratings": ratings,
+            "page": 1,
+            "pages": pages,
             "error_message": f"⚠️ Não pode eliminar jogadores com jogos!"
         }
         return templates.TemplateResponse("players.html", context)
 
     db.delete(player)
+    cache_service.bump(db, cache_service.PLAYERS_KEY)
     db.commit()
+    invalidate_roster()
 
     return RedirectResponse(
         url=f"/players",
         status_code=303
-    )
\ No newline at end of file
+    )
+
+# Histórico de jogos do jogador (todas as competições)
+@router.get("/{player_id}", response_class=HTMLResponse)
+async def player_history(
+    request: Request,
+    player_id: str,
+    after: str = Query(None),
+    db: Session = Depends(get_read_db)
+):
+    player = await run_db(db, get_by_id, player_id)
+    if not player:
+        raise HTTPException(404, "Player not found")
+
+    try:
+        history, next_cursor = await run_db(db, get_history, player_id, after)
+    except ValueError:
+        raise HTTPException(400, "Cursor inválido")
+    ratings = await run_db(db, rating_service.get_current, [player_id])
+
+    return templates.TemplateResponse(
+        "player_history.html",
+        {
+            "request": request,
+            "player": player,
+            "rating": ratings.get(player_id),
+            "games": await run_db(db, count_games, [player_id]),
+            "history": history,
+            "after": after,
+            "next_cursor": next_cursor
+        }
+    )
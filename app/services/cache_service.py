@@ -0,0 +1,107 @@
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.models.cache_version import CacheVersion
+from app.models.game_day import GameDay
+
+PLAYERS_KEY = "players"
+
+# Nº de páginas HTML guardadas por processo (0 desliga a cache de HTML;
+# os ETag/304 continuam ativos)
+HTML_CACHE_SIZE = int(os.environ.get("HTML_CACHE_SIZE", "256"))
+_html_cache = OrderedDict()
+
+# Muda a cada deploy que altere templates, para não servir 304 de HTML antigo
+_TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+_RELEASE = hashlib.sha1(
+    "".join(
+        f"{p.name}:{p.stat().st_mtime_ns}" for p in sorted(_TEMPLATES_DIR.glob("*.html"))
+    ).encode()
+).hexdigest()[:8]
+
+_UPSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+def competition_key(competition_id: str) -> str:
+    return f"competition:{competition_id}"
+
+def game_day_key(game_day_id: str) -> str:
+    return f"game_day:{game_day_id}"
+
+def bump(db: Session, *keys):
+    """Incrementa a versão das chaves (sem commit); as páginas que dependem delas
+    deixam de corresponder ao ETag que o browser tem"""
+    keys = sorted(set(keys))
+    if not keys:
+        return
+
+    stmt = _UPSERTS[db.get_bind().dialect.name](CacheVersion).values(
+        [{"key": key, "version": 1} for key in keys]
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[CacheVersion.key],
+        set_={"version": CacheVersion.version + 1}
+    ))
+
+def bump_competition(db: Session, competition_id: str):
+    """Alterações à competição (nome, datas) aparecem também nas páginas dos dias"""
+    day_ids = db.query(GameDay.id).filter(GameDay.competition_id == competition_id)
+    bump(
+        db,
+        competition_key(competition_id),
+        *(game_day_key(day_id) for day_id, in day_ids)
+    )
+
+def get_versions(db: Session, keys) -> dict:
+    versions = {key: 0 for key in keys}
+    versions.update(
+        db.query(CacheVersion.key, CacheVersion.version)
+        .filter(CacheVersion.key.in_(keys))
+        .all()
+    )
+    return versions
+
+def make_etag(request: Request, versions: dict) -> str:
+    parts = [_RELEASE, request.url.path, request.url.query]
+    parts += [f"{key}={version}" for key, version in sorted(versions.items())]
+    return 'W/"%s"' % hashlib.sha1("|".join(parts).encode()).hexdigest()[:20]
+
+def not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (t.strip() for t in header.split(","))
+
+def cached_response(request: Request, etag: str):
+    """304 se o browser já tem esta versão, HTML em cache se existir, senão None"""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    body = _html_cache.get(etag)
+    if body is not None:
+        _html_cache.move_to_end(etag)
+        return HTMLResponse(body, headers=headers)
+
+    return None
+
+def store_response(etag: str, response):
+    """Acrescenta o ETag à resposta acabada de renderizar e guarda o HTML"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+    if HTML_CACHE_SIZE > 0 and response.status_code == 200:
+        _html_cache[etag] = response.body
+        while len(_html_cache) > HTML_CACHE_SIZE:
+            _html_cache.popitem(last=False)
+
+    return response
+
+def clear_html_cache():
+    _html_cache.clear()
@@ -1,5 +1,10 @@
+from datetime import date
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session
 from app.models.competition import Competition
+from app.models.game_day import GameDay
+
+PAGE_SIZE = 25
 
 def get_all(db: Session):
     return db.query(Competition).all()
@@ -23,4 +28,59 @@ def update_status(db: Session, competition_id: str, status: str):
         db.refresh(competition)
     return competition
 
+def _like_pattern(search: str) -> str:
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def list_with_days(db: Session, search: str = None, after: str = None, limit: int = PAGE_SIZE):
+    """Lista de competições (mais recentes primeiro) com o total de dias de jogo.
+
+    Paginação por keyset: after é o cursor devolvido pela página anterior.
+    Devolve (competições, cursor da página seguinte ou None).
+    """
+    # Subconsulta correlacionada: só conta os dias das competições da página
+    # (usa ix_game_days_competition_date), em vez de agrupar game_days inteira
+    total_days = (
+        select(func.count())
+        .where(GameDay.competition_id == Competition.id)
+        .correlate(Competition)
+        .scalar_subquery()
+    )
+
+    query = db.query(Competition, total_days)
+
+    if search:
+        # ILIKE: usa o índice trigram em PostgreSQL (em SQLite é um scan simples)
+        query = query.filter(Competition.name.ilike(_like_pattern(search), escape="\\"))
+
+    if after:
+        after_date, after_id = after.split("_", 1)
+        query = query.filter(
+            tuple_(Competition.start_date, Competition.id)
+            < tuple_(date.fromisoformat(after_date), after_id)
+        )
+
+    rows = (
+        query.order_by(Competition.start_date.desc(), Competition.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    competitions = [
+        {
+            "id": c.id,
+            "name": c.name,
+            "start_date": c.start_date,
+            "end_date": c.end_date,
+            "total_days": days,
+            "status": c.status
+        }
+        for c, days in rows[:limit]
+    ]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = competitions[-1]
+        next_cursor = f"{last['start_date'].isoformat()}_{last['id']}"
 
+    return competitions, next_cursor
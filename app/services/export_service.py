@@ -0,0 +1,225 @@
+import csv
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.game_day import GameDay
+from app.models.match import Match, MatchPlayer
+from app.models.player import Player
+
+# Linhas lidas do cursor de cada vez (server-side cursor em PostgreSQL)
+YIELD_PER = 1000
+# Linhas acumuladas antes de enviar um bloco ao cliente
+CHUNK_ROWS = 500
+
+MATCH_HEADER = [
+    "Data", "Grupo", "Ronda", "Hora", "Campo",
+    "Equipa A", "Equipa B", "Pontos A", "Pontos B"
+]
+STANDING_HEADER = [
+    "#", "Jogador", "Jogos", "Vitórias", "Empates", "Derrotas",
+    "WinRate %", "Pontos Feitos", "Pontos Sofridos", "Pontos"
+]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def filename(title: str, fmt: str) -> str:
+    """Nome de ficheiro ASCII seguro para o Content-Disposition"""
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", title).strip("-").lower()
+    return f"{slug or 'export'}.{fmt}"
+
+
+def iter_match_rows(db: Session, *filters):
+    """Uma linha por jogo (nomes dos jogadores já resolvidos), em ordem cronológica.
+
+    Lê (jogo, jogador) com yield_per, sem carregar o histórico todo em memória.
+    """
+    query = (
+        select(
+            Match.id, GameDay.date, GameDay.group_name, Match.order, Match.scheduled_at,
+            Match.court, Match.points_team_a, Match.points_team_b,
+            MatchPlayer.team, Player.name
+        )
+        .join(Match, Match.game_day_id == GameDay.id)
+        .join(MatchPlayer, MatchPlayer.match_id == Match.id)
+        .join(Player, Player.id == MatchPlayer.player_id)
+        .where(*filters)
+        .order_by(GameDay.date, GameDay.id, Match.order, Match.court, Match.id, MatchPlayer.team)
+        .execution_options(yield_per=YIELD_PER)
+    )
+
+    current, row, teams = None, None, None
+    for match_id, day, group, order, at, court, pts_a, pts_b, team, name in db.execute(query):
+        if match_id != current:
+            if current is not None:
+                yield row[:5] + [" / ".join(teams["A"]), " / ".join(teams["B"])] + row[5:]
+            current = match_id
+            row = [day.isoformat(), group or "", order, at.strftime("%H:%M"), court, pts_a, pts_b]
+            teams = {"A": [], "B": []}
+        teams[team].append(name)
+
+    if current is not None:
+        yield row[:5] + [" / ".join(teams["A"]), " / ".join(teams["B"])] + row[5:]
+
+
+def standing_rows(ranking):
+    for pos, r in enumerate(ranking, start=1):
+        yield [
+            pos, r["name"], r["games"], r["wins"], r["ties"], r["losses"],
+            r["win_rate"], r["points_for"], r["points_against"], r["points"]
+        ]
+
+
+def stream_csv(matches, standings):
+    """CSV (separador ';' e BOM, para abrir diretamente no Excel) em blocos:
+    jogos, linha em branco, classificação"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+
+    buffer.write("\ufeff")
+    sections = ((MATCH_HEADER, matches), (STANDING_HEADER, standings))
+    for i, (header, rows) in enumerate(sections):
+        if i:
+            writer.writerow([])
+        writer.writerow(header)
+        for n, row in enumerate(rows, start=1):
+            writer.writerow(row)
+            if n % CHUNK_ROWS == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+# ---------- XLSX ----------
+# Escrito à mão (SpreadsheetML mínimo) num zip em modo streaming: cada folha
+# é comprimida à medida que as linhas chegam e os bytes seguem logo para o cliente.
+
+class _Pipe:
+    """Destino não posicionável para o ZipFile; acumula bytes até serem drenados"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '{sheets}'
+    '</Types>'
+)
+_SHEET_CONTENT_TYPE = (
+    '<Override PartName="/xl/worksheets/sheet{n}.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets>{sheets}</sheets></workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '{sheets}</Relationships>'
+)
+_SHEET_REL = (
+    '<Relationship Id="rId{n}" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet{n}.xml"/>'
+)
+_SHEET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_CLOSE = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_row(row) -> bytes:
+    return ("<row>" + "".join(map(_xlsx_cell, row)) + "</row>").encode()
+
+
+def stream_xlsx(matches, standings):
+    """Livro XLSX com as folhas "Jogos" e "Classificação", enviado em blocos"""
+    sheets = [("Jogos", MATCH_HEADER, matches), ("Classificação", STANDING_HEADER, standings)]
+    numbers = range(1, len(sheets) + 1)
+
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES.format(
+            sheets="".join(_SHEET_CONTENT_TYPE.format(n=n) for n in numbers)
+        ))
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(sheets="".join(
+            f'<sheet name="{escape(title)}" sheetId="{n}" r:id="rId{n}"/>'
+            for n, (title, _, _) in zip(numbers, sheets)
+        )))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS.format(
+            sheets="".join(_SHEET_REL.format(n=n) for n in numbers)
+        ))
+        yield pipe.drain()
+
+        for n, (_, header, rows) in zip(numbers, sheets):
+            with zf.open(f"xl/worksheets/sheet{n}.xml", "w", force_zip64=True) as sheet:
+                sheet.write(_SHEET_OPEN.encode())
+                sheet.write(_xlsx_row(header))
+                for i, row in enumerate(rows, start=1):
+                    sheet.write(_xlsx_row(row))
+                    if i % CHUNK_ROWS == 0:
+                        yield pipe.drain()
+                sheet.write(_SHEET_CLOSE.encode())
+            yield pipe.drain()
+
+    yield pipe.drain()
+
+
+STREAMS = {"csv": stream_csv, "xlsx": stream_xlsx}
+
+
+def export(fmt: str, ranking, *filters):
+    """Gerador do ficheiro (jogos que satisfazem os filtros + ranking(db)).
+
+    Abre a sua própria sessão: corre enquanto a resposta é enviada,
+    depois de a sessão do pedido já ter sido fechada.
+    """
+    db = SessionLocal()
+    try:
+        standings = list(standing_rows(ranking(db)))
+        yield from STREAMS[fmt](iter_match_rows(db, *filters), standings)
+    finally:
+        db.close()
@@ -1,5 +1,7 @@
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from app.models.game_day import GameDay
+from app.models.game_day import GameDay, game_day_players
+from app.models.match import Match
 from app.models.player import Player
 from datetime import date
 
@@ -14,6 +16,36 @@ def get_by_competition(db: Session, competition_id: str):
         .all()
     )
 
+def get_rows(db: Session, competition_id: str):
+    """Dias de jogo da competição como dicionários, com o nº de inscritos e de jogos
+    (projeção Core, duas contagens agrupadas em vez de carregar as relações)"""
+    players = (
+        select(game_day_players.c.game_day_id, func.count().label("players"))
+        .group_by(game_day_players.c.game_day_id)
+        .subquery()
+    )
+    matches = (
+        select(Match.game_day_id, func.count().label("matches"))
+        .group_by(Match.game_day_id)
+        .subquery()
+    )
+
+    query = (
+        select(
+            GameDay.id,
+            GameDay.date,
+            GameDay.num_courts,
+            GameDay.group_name,
+            func.coalesce(players.c.players, 0).label("players"),
+            func.coalesce(matches.c.matches, 0).label("matches"),
+        )
+        .outerjoin(players, players.c.game_day_id == GameDay.id)
+        .outerjoin(matches, matches.c.game_day_id == GameDay.id)
+        .where(GameDay.competition_id == competition_id)
+        .order_by(GameDay.date, GameDay.id)
+    )
+    return [dict(row) for row in db.execute(query).mappings()]
+
 def create(db: Session, competition_id: str, date_obj: date, num_courts: int = 2, group_name = str):
     if num_courts < 2:
         num_courts = 2
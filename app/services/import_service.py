@@ -0,0 +1,293 @@
+import csv
+import io
+import itertools
+import uuid
+from datetime import date, datetime
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from app.models.game_day import GameDay, game_day_players
+from app.models.match import Match, MatchPlayer
+from app.models.player import Player
+from app.services import cache_service, pair_service, rating_service, standings_service
+from app.services.schedule_service import START_TIME, ROUND_DURATION
+
+# Linhas por INSERT multi-linha
+BATCH_SIZE = 1000
+# Só pares: classificações, pares e ratings assumem 2 jogadores por equipa
+TEAM_SIZE = 2
+
+# Cabeçalhos aceites -> campo (o CSV de jogos é o mesmo formato do export)
+PLAYER_COLUMNS = {
+    "nome": "name", "name": "name",
+    "sexo": "sexo",
+    "nível": "nivel", "nivel": "nivel",
+    "nascimento": "data_nascimento", "data_nascimento": "data_nascimento",
+}
+MATCH_COLUMNS = {
+    "data": "date", "grupo": "group", "ronda": "order", "hora": "time", "campo": "court",
+    "equipa a": "team_a", "equipa b": "team_b", "pontos a": "points_a", "pontos b": "points_b",
+}
+PLAYER_REQUIRED = ("name", "data_nascimento")
+MATCH_REQUIRED = ("date", "order", "court", "team_a", "team_b", "points_a", "points_b")
+
+
+def text_lines(binary_file):
+    """Lê um upload (ficheiro binário) como texto, linha a linha, sem o carregar todo"""
+    return io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+
+
+def _rows(lines, columns: dict, required, stop_at_blank: bool = False):
+    """(nº da linha, {campo: valor}) para cada linha do CSV; separador ';' ou ','"""
+    lines = iter(lines)
+    header = next(lines, "")
+    delimiter = ";" if header.count(";") >= header.count(",") else ","
+
+    reader = csv.reader(itertools.chain([header], lines), delimiter=delimiter)
+    fields = [columns.get(h.strip().lower()) for h in next(reader, [])]
+    missing = [field for field in required if field not in fields]
+    if missing:
+        labels = {field: header for header, field in reversed(columns.items())}
+        raise ValueError(
+            f"Colunas em falta no cabeçalho: {', '.join(labels[f].title() for f in missing)}"
+        )
+
+    for values in reader:
+        if not any(v.strip() for v in values):
+            if stop_at_blank:
+                break
+            continue
+        yield reader.line_num, {
+            f: v.strip() for f, v in zip(fields, values) if f is not None
+        }
+
+
+def _parse_date(value: str) -> date:
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Data inválida '{value}'")
+
+
+def _parse_int(value: str, label: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{label} inválido '{value}'")
+
+
+def _result(imported: int, errors: list, **extra) -> dict:
+    return {"imported": imported, "errors": errors, **extra}
+
+
+# ---------- Jogadores ----------
+def import_players(db: Session, lines) -> dict:
+    """Importa jogadores de um CSV (Nome;Sexo;Nível;Nascimento) sem commit.
+
+    Nomes repetidos (na base de dados ou no próprio ficheiro, sem distinguir
+    maiúsculas) são reportados como erro da linha e ignorados.
+    """
+    existing = {name.lower() for name, in db.query(Player.name)}
+    errors, batch, imported = [], [], 0
+
+    try:
+        for line, row in _rows(lines, PLAYER_COLUMNS, PLAYER_REQUIRED):
+            try:
+                name = row.get("name", "")
+                if not name:
+                    raise ValueError("Nome em falta")
+                if name.lower() in existing:
+                    raise ValueError(f"Jogador '{name}' já existe")
+                values = {
+                    "id": str(uuid.uuid4()),
+                    "name": name,
+                    "sexo": row.get("sexo") or None,
+                    "nivel": row.get("nivel") or None,
+                    "data_nascimento": _parse_date(row.get("data_nascimento", "")),
+                }
+            except ValueError as e:
+                errors.append((line, str(e)))
+                continue
+
+            existing.add(name.lower())
+            batch.append(values)
+            if len(batch) >= BATCH_SIZE:
+                db.execute(insert(Player), batch)
+                imported += len(batch)
+                batch.clear()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        errors.append((0, str(e)))
+
+    if batch:
+        db.execute(insert(Player), batch)
+        imported += len(batch)
+
+    return _result(imported, errors)
+
+
+# ---------- Jogos históricos ----------
+class _MatchImport:
+    """Estado de uma importação de jogos: dias criados, inscrições e lotes pendentes"""
+
+    def __init__(self, db: Session, competition_id: str):
+        self.db = db
+        self.competition_id = competition_id
+
+        self.players = {name.lower(): pid for pid, name in db.query(Player.id, Player.name)}
+
+        days = db.query(GameDay.id, GameDay.date, GameDay.group_name).filter(
+            GameDay.competition_id == competition_id
+        ).all()
+        self.days = {(d, group or ""): day_id for day_id, d, group in days}
+        day_ids = [day_id for day_id, _, _ in days]
+
+        self.locked_days = {
+            day_id for day_id, in db.query(Match.game_day_id)
+            .filter(Match.game_day_id.in_(day_ids)).distinct()
+        }
+        self.enrolled = set(
+            db.query(game_day_players.c.game_day_id, game_day_players.c.player_id)
+            .filter(game_day_players.c.game_day_id.in_(day_ids))
+        )
+
+        self.new_days = {}      # id -> valores do GameDay
+        self.pending_days = []
+        self.slots = set()      # (dia, ronda, campo)
+        self.matches = []
+        self.match_players = []
+        self.enrollments = []
+        self.imported = 0
+
+    def _day_id(self, day: date, group: str) -> str:
+        day_id = self.days.get((day, group))
+        if day_id in self.locked_days:
+            raise ValueError(f"O dia {day.isoformat()} {group}".rstrip() + " já tem jogos")
+
+        if day_id is None:
+            day_id = self.days[(day, group)] = str(uuid.uuid4())
+            values = {
+                "id": day_id,
+                "competition_id": self.competition_id,
+                "date": day,
+                "num_courts": 2,
+                "group_name": group or None,
+            }
+            self.new_days[day_id] = values
+            self.pending_days.append(values)
+        return day_id
+
+    def _team(self, value: str) -> list[str]:
+        names = [n.strip() for n in value.split("/") if n.strip()]
+        if len(names) != TEAM_SIZE:
+            raise ValueError(f"Equipa '{value}' com {len(names)} jogador(es) em vez de {TEAM_SIZE}")
+
+        unknown = [n for n in names if n.lower() not in self.players]
+        if unknown:
+            raise ValueError(f"Jogador(es) desconhecido(s): {', '.join(unknown)}")
+        return [self.players[n.lower()] for n in names]
+
+    def add(self, row: dict):
+        day = _parse_date(row.get("date", ""))
+        order = _parse_int(row.get("order", ""), "Ronda")
+        court = _parse_int(row.get("court", ""), "Campo")
+        points_a = _parse_int(row.get("points_a", ""), "Pontos A")
+        points_b = _parse_int(row.get("points_b", ""), "Pontos B")
+        team_a = self._team(row.get("team_a", ""))
+        team_b = self._team(row.get("team_b", ""))
+        if len(set(team_a + team_b)) != len(team_a) + len(team_b):
+            raise ValueError("Jogador repetido no mesmo jogo")
+
+        if row.get("time"):
+            try:
+                at = datetime.combine(day, datetime.strptime(row["time"], "%H:%M").time())
+            except ValueError:
+                raise ValueError(f"Hora inválida '{row['time']}'")
+        else:
+            at = datetime.combine(day, START_TIME) + (order - 1) * ROUND_DURATION
+
+        day_id = self._day_id(day, row.get("group", ""))
+        if (day_id, order, court) in self.slots:
+            raise ValueError(f"Ronda {order}, campo {court} repetido")
+        self.slots.add((day_id, order, court))
+
+        if day_id in self.new_days:
+            self.new_days[day_id]["num_courts"] = max(self.new_days[day_id]["num_courts"], court)
+
+        match_id = str(uuid.uuid4())
+        self.matches.append({
+            "id": match_id,
+            "game_day_id": day_id,
+            "order": order,
+            "scheduled_at": at,
+            "court": court,
+            "points_team_a": points_a,
+            "points_team_b": points_b,
+        })
+        for team, ids in (("A", team_a), ("B", team_b)):
+            for pid in ids:
+                self.match_players.append({
+                    "match_id": match_id, "player_id": pid, "team": team,
+                    "date": day, "game_day_id": day_id, "order": order, "court": court,
+                })
+                if (day_id, pid) not in self.enrolled:
+                    self.enrolled.add((day_id, pid))
+                    self.enrollments.append({"game_day_id": day_id, "player_id": pid})
+
+        if len(self.matches) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        db = self.db
+        if self.pending_days:
+            db.execute(insert(GameDay), self.pending_days)
+            self.pending_days = []
+        if self.matches:
+            db.execute(insert(Match), self.matches)
+            db.execute(insert(MatchPlayer), self.match_players)
+            self.imported += len(self.matches)
+            self.matches, self.match_players = [], []
+
+    def finish(self):
+        self.flush()
+        db = self.db
+        if self.imported:
+            rating_service.lock(db)
+
+        if self.enrollments:
+            db.execute(game_day_players.insert(), self.enrollments)
+        if self.new_days:
+            db.execute(update(GameDay), [
+                {"id": day_id, "num_courts": values["num_courts"]}
+                for day_id, values in self.new_days.items()
+            ])
+
+        if self.imported:
+            standings_service.rebuild(db, self.competition_id)
+            pair_service.rebuild(db, self.competition_id)
+            rating_service.replay_from(db, *{day_id for day_id, _, _ in self.slots})
+            cache_service.bump_competition(db, self.competition_id)
+
+
+def import_matches(db: Session, competition_id: str, lines) -> dict:
+    """Importa jogos históricos de um CSV no formato do export
+    (Data;Grupo;Ronda;Hora;Campo;Equipa A;Equipa B;Pontos A;Pontos B) sem commit.
+
+    Os dias de jogo (data + grupo) são criados quando não existem; dias que já
+    têm jogos não são alterados. Os jogadores são identificados pelo nome.
+    Uma linha em branco termina a tabela (a classificação do export é ignorada).
+    """
+    state = _MatchImport(db, competition_id)
+    errors = []
+
+    try:
+        for line, row in _rows(lines, MATCH_COLUMNS, MATCH_REQUIRED, stop_at_blank=True):
+            try:
+                state.add(row)
+            except ValueError as e:
+                errors.append((line, str(e)))
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        errors.append((0, str(e)))
+
+    state.finish()
+    return _result(state.imported, errors, game_days=len(state.new_days))
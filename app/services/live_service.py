@@ -0,0 +1,210 @@
+import asyncio
+from collections import defaultdict
+from starlette.concurrency import run_in_threadpool
+from app.database import SessionLocal
+from app.models.game_day import GameDay
+from app.models.match import Match
+from app.models.player import Player
+from app.services import cache_service
+from app.services.ranking_service import compute_standings, load_batch, rank
+
+# Espera antes de enviar, para juntar rajadas de escritas (p.ex. "Guardar Resultados")
+COALESCE_DELAY = 0.25
+# Sem atualizações, cada subscritor recebe um heartbeat a cada HEARTBEAT segundos
+HEARTBEAT = 15
+# Escritas noutros workers são detetadas pela versão do dia (cache_versions)
+POLL_INTERVAL = 5
+
+
+def load_snapshot(game_day_id: str):
+    """Resultados, top 3 e classificação do dia; None se o dia não existir"""
+    db = SessionLocal()
+    try:
+        key = cache_service.game_day_key(game_day_id)
+        version = cache_service.get_versions(db, [key])[key]
+
+        scores = {
+            match_id: [a, b, version]
+            for match_id, a, b, version in db.query(
+                Match.id, Match.points_team_a, Match.points_team_b, Match.version
+            ).filter(Match.game_day_id == game_day_id)
+        }
+        if not scores and not _game_day_exists(db, game_day_id):
+            return None
+
+        batch = load_batch(db, Match.game_day_id == game_day_id)
+        standings = compute_standings(batch)
+        names = dict(
+            db.query(Player.id, Player.name).filter(Player.id.in_(batch.player_ids)).all()
+        )
+
+        return {
+            "version": version,
+            "scores": scores,
+            "top3": rank(standings, names, sort_keys=("points",), top=3),
+            "standings": rank(standings, names),
+        }
+    finally:
+        db.close()
+
+
+def _game_day_exists(db, game_day_id: str) -> bool:
+    return db.query(GameDay.id).filter(GameDay.id == game_day_id).first() is not None
+
+
+def diff(old: dict, new: dict):
+    """Mensagem a enviar quando o dia passa de old para new (None se nada mudou)"""
+    if old["scores"].keys() != new["scores"].keys():
+        # jogos gerados ou eliminados: o ecrã tem de recarregar a página
+        return {"reload": True}
+
+    changed = {mid: s for mid, s in new["scores"].items() if old["scores"][mid] != s}
+    if not changed:
+        return None
+    return {"scores": changed, "top3": new["top3"], "standings": new["standings"]}
+
+
+class _Subscriber:
+    """Caixa de uma só mensagem: se o cliente se atrasar, as mensagens pendentes
+    são fundidas (os resultados acumulam, top 3 e classificação ficam os mais recentes)"""
+    __slots__ = ("event", "pending")
+
+    def __init__(self):
+        self.event = asyncio.Event()
+        self.pending = None
+
+    def push(self, message: dict):
+        pending = self.pending
+        if pending is None or "reload" in message:
+            self.pending = message
+        elif "reload" not in pending:
+            self.pending = {**message, "scores": {**pending["scores"], **message["scores"]}}
+        self.event.set()
+
+    async def next(self, timeout: float):
+        """Próxima mensagem, ou None ao fim de timeout segundos (heartbeat)"""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.event.clear()
+        message, self.pending = self.pending, None
+        return message
+
+
+class Broadcaster:
+    """Fan-out em memória (por worker) das alterações de resultados de cada dia.
+
+    As rotas de escrita chamam publish() depois do commit (a partir de qualquer
+    thread). Os dias alterados são recalculados uma vez por rajada e o delta é
+    entregue a todos os subscritores desse dia.
+    """
+
+    def __init__(self, coalesce_delay: float = COALESCE_DELAY, heartbeat: float = HEARTBEAT,
+                 poll_interval: float = POLL_INTERVAL):
+        self.coalesce_delay = coalesce_delay
+        self.heartbeat = heartbeat
+        self.poll_interval = poll_interval
+
+        self._subscribers = defaultdict(set)   # game_day_id -> {_Subscriber}
+        self._state = {}                       # game_day_id -> último snapshot
+        self._dirty = set()
+        self._loop = None
+        self._flush_task = None
+        self._poll_task = None
+
+    def subscriber_count(self, game_day_id: str = None) -> int:
+        if game_day_id is not None:
+            return len(self._subscribers.get(game_day_id, ()))
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def publish(self, game_day_id: str):
+        """Assinala que os resultados do dia mudaram (thread-safe, não bloqueia)"""
+        loop = self._loop
+        if loop is None or game_day_id not in self._subscribers:
+            return
+        loop.call_soon_threadsafe(self._mark_dirty, game_day_id)
+
+    def _mark_dirty(self, game_day_id: str):
+        self._dirty.add(game_day_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        await asyncio.sleep(self.coalesce_delay)
+        dirty, self._dirty = self._dirty, set()
+
+        for game_day_id in dirty:
+            if game_day_id not in self._subscribers:
+                continue
+
+            snapshot = await run_in_threadpool(load_snapshot, game_day_id)
+            old = self._state.get(game_day_id)
+            if snapshot is None or old is None:
+                continue
+
+            self._state[game_day_id] = snapshot
+            message = diff(old, snapshot)
+            if message:
+                for subscriber in list(self._subscribers.get(game_day_id, ())):
+                    subscriber.push(message)
+
+    async def _poll(self):
+        """Deteta escritas feitas noutros workers (uma query por intervalo)"""
+        while self._subscribers:
+            await asyncio.sleep(self.poll_interval)
+            if not self._subscribers:
+                break
+
+            keys = {cache_service.game_day_key(gid): gid for gid in self._subscribers}
+            versions = await run_in_threadpool(_read_versions, list(keys))
+            for key, version in versions.items():
+                state = self._state.get(keys[key])
+                if state is not None and state["version"] != version:
+                    self._mark_dirty(keys[key])
+
+    async def subscribe(self, game_day_id: str):
+        """Gerador assíncrono: primeiro o estado completo, depois deltas (None = heartbeat).
+
+        Levanta LookupError na primeira iteração se o dia não existir.
+        """
+        self._loop = asyncio.get_running_loop()
+
+        snapshot = self._state.get(game_day_id)
+        if snapshot is None:
+            snapshot = await run_in_threadpool(load_snapshot, game_day_id)
+            if snapshot is None:
+                raise LookupError(game_day_id)
+            self._state[game_day_id] = snapshot
+
+        subscriber = _Subscriber()
+        self._subscribers[game_day_id].add(subscriber)
+        if self._poll_task is None or self._poll_task.done():
+            self._poll_task = asyncio.create_task(self._poll())
+
+        try:
+            yield {
+                "scores": snapshot["scores"],
+                "top3": snapshot["top3"],
+                "standings": snapshot["standings"],
+            }
+            while True:
+                yield await subscriber.next(self.heartbeat)
+        finally:
+            subscribers = self._subscribers.get(game_day_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[game_day_id]
+                    self._state.pop(game_day_id, None)
+
+
+def _read_versions(keys):
+    db = SessionLocal()
+    try:
+        return cache_service.get_versions(db, keys)
+    finally:
+        db.close()
+
+
+broadcaster = Broadcaster()
@@ -1,5 +1,15 @@
+from typing import NamedTuple
+from sqlalchemy import case, insert, select, update
 from sqlalchemy.orm import Session
-from app.models.match import Match
+from app.models.game_day import GameDay
+from app.models.match import Match, MatchPlayer
+from app.services import standings_service, cache_service, pair_service, rating_service
+
+
+class Teams(NamedTuple):
+    """Jogadores das duas equipas de um jogo (o que match_delta precisa)"""
+    team_a_ids: list
+    team_b_ids: list
 
 def get_by_game_day(db: Session, game_day_id: str):
     return (
@@ -8,3 +18,165 @@ def get_by_game_day(db: Session, game_day_id: str):
         .order_by(Match.order)
         .all()
     )
+
+def get_rows(db: Session, game_day_id: str):
+    """Jogos do dia como dicionários com as duas equipas (projeção Core, duas queries)"""
+    rows = db.execute(
+        select(Match.id, Match.order, Match.court, Match.scheduled_at,
+               Match.points_team_a, Match.points_team_b)
+        .where(Match.game_day_id == game_day_id)
+        .order_by(Match.order, Match.court)
+    ).mappings()
+    matches = {row["id"]: {**row, "team_a": [], "team_b": []} for row in rows}
+
+    if matches:
+        teams = db.execute(
+            select(MatchPlayer.match_id, MatchPlayer.team, MatchPlayer.player_id)
+            .where(MatchPlayer.match_id.in_(matches.keys()))
+        )
+        for match_id, team, player_id in teams:
+            matches[match_id]["team_a" if team == "A" else "team_b"].append(player_id)
+
+    return list(matches.values())
+
+def insert_matches(db: Session, game_day_id: str, competition_id: str, scheduled):
+    """Grava jogos gerados (ScheduledMatch) com um INSERT multi-linha por tabela
+    e contabiliza-os na classificação (sem commit)"""
+    if not scheduled:
+        return
+
+    rating_service.lock(db)
+    day = db.execute(select(GameDay.date).where(GameDay.id == game_day_id)).scalar_one()
+    db.execute(insert(Match), [
+        {
+            "id": m.id,
+            "game_day_id": game_day_id,
+            "order": m.order,
+            "scheduled_at": m.scheduled_at,
+            "court": m.court,
+            "points_team_a": m.points_team_a,
+            "points_team_b": m.points_team_b,
+        }
+        for m in scheduled
+    ])
+    db.execute(insert(MatchPlayer), [
+        {
+            "match_id": m.id, "player_id": pid, "team": team,
+            "date": day, "game_day_id": game_day_id, "order": m.order, "court": m.court,
+        }
+        for m in scheduled
+        for team, ids in (("A", m.team_a_ids), ("B", m.team_b_ids))
+        for pid in ids
+    ])
+
+    deltas, pairs = {}, {}
+    for m in scheduled:
+        standings_service.match_delta(deltas, m, new=(m.points_team_a, m.points_team_b))
+        pair_service.match_delta(pairs, m, new=(m.points_team_a, m.points_team_b))
+    standings_service.apply_deltas(db, competition_id, deltas)
+    pair_service.apply_deltas(db, competition_id, pairs)
+    rating_service.replay_from(db, game_day_id)
+    cache_service.bump(
+        db, cache_service.competition_key(competition_id), cache_service.game_day_key(game_day_id)
+    )
+
+def get_teams(db: Session, match_ids) -> dict:
+    """{match_id: Teams} numa só query a match_players"""
+    teams = {match_id: Teams([], []) for match_id in match_ids}
+    rows = db.execute(
+        select(MatchPlayer.match_id, MatchPlayer.team, MatchPlayer.player_id)
+        .where(MatchPlayer.match_id.in_(teams.keys()))
+    )
+    for match_id, team, player_id in rows:
+        (teams[match_id].team_a_ids if team == "A" else teams[match_id].team_b_ids).append(player_id)
+    return teams
+
+def update_scores(db: Session, game_day_id: str, scores: dict, versions: dict = None) -> list[str]:
+    """Grava resultados ({match_id: (pontos A, pontos B)}) de jogos do dia com um só
+    UPDATE das linhas alteradas, aplicando só a diferença na classificação (sem commit).
+
+    Concorrência otimista: versions ({match_id: versão}) são as versões que o
+    utilizador tinha no formulário. Um jogo que outra pessoa alterou entretanto não
+    é gravado (nem um alterado entre esta leitura e o UPDATE, que só escreve as
+    linhas cuja versão ainda é a lida). Devolve os ids desses jogos (conflitos).
+    """
+    versions = versions or {}
+    current = db.execute(
+        select(Match.id, Match.points_team_a, Match.points_team_b, Match.version)
+        .where(Match.game_day_id == game_day_id, Match.id.in_(scores.keys()))
+    )
+
+    changes, conflicts = {}, []
+    for match_id, points_a, points_b, version in current:
+        old, new = (points_a, points_b), tuple(scores[match_id])
+        if new == old:
+            continue
+        if versions.get(match_id, version) != version:
+            conflicts.append(match_id)
+            continue
+        changes[match_id] = (old, new, version)
+
+    if not changes:
+        return conflicts
+
+    rating_service.lock(db)
+    by_id = lambda values: case(values, value=Match.id)
+    applied = set(db.execute(
+        update(Match)
+        .where(
+            Match.id.in_(changes.keys()),
+            Match.version == by_id({mid: version for mid, (_, _, version) in changes.items()}),
+        )
+        .values(
+            points_team_a=by_id({mid: new[0] for mid, (_, new, _) in changes.items()}),
+            points_team_b=by_id({mid: new[1] for mid, (_, new, _) in changes.items()}),
+            version=Match.version + 1,
+        )
+        .returning(Match.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    conflicts += [mid for mid in changes if mid not in applied]
+    if not applied:
+        return conflicts
+
+    deltas, pairs = {}, {}
+    for match_id, teams in get_teams(db, applied).items():
+        old, new, _ = changes[match_id]
+        standings_service.match_delta(deltas, teams, old=old, new=new)
+        pair_service.match_delta(pairs, teams, old=old, new=new)
+
+    competition_id = standings_service.get_competition_id(db, game_day_id)
+    standings_service.apply_deltas(db, competition_id, deltas)
+    pair_service.apply_deltas(db, competition_id, pairs)
+    rating_service.replay_from(db, game_day_id)
+    cache_service.bump(
+        db, cache_service.competition_key(competition_id), cache_service.game_day_key(game_day_id)
+    )
+    return conflicts
+
+def delete_by_game_day(db: Session, game_day_id: str):
+    """Elimina os jogos de um dia (e as respetivas equipas) descontando-os da classificação"""
+    matches = get_by_game_day(db, game_day_id)
+    if not matches:
+        return
+
+    rating_service.lock(db)
+    deltas, pairs = {}, {}
+    for match in matches:
+        old = (match.points_team_a, match.points_team_b)
+        standings_service.match_delta(deltas, match, old=old)
+        pair_service.match_delta(pairs, match, old=old)
+    competition_id = standings_service.get_competition_id(db, game_day_id)
+    standings_service.apply_deltas(db, competition_id, deltas)
+    pair_service.apply_deltas(db, competition_id, pairs)
+    cache_service.bump(
+        db, cache_service.competition_key(competition_id), cache_service.game_day_key(game_day_id)
+    )
+
+    match_ids = db.query(Match.id).filter(Match.game_day_id == game_day_id)
+
+    db.query(MatchPlayer).filter(
+        MatchPlayer.match_id.in_(match_ids.scalar_subquery())
+    ).delete(synchronize_session=False)
+    db.query(Match).filter(Match.game_day_id == game_day_id).delete(synchronize_session=False)
+    rating_service.replay_from(db, game_day_id)
@@ -0,0 +1,180 @@
+from sqlalchemy import and_, case, delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, aliased
+from app.models.game_day import GameDay
+from app.models.match import Match, MatchPlayer
+from app.models.pair_stat import OPPONENT, PARTNER, PairStat
+from app.models.player import Player
+
+COLUMNS = ("games", "wins", "ties", "point_diff")
+KEY = ("relation", "player_id", "other_id")
+
+# Linhas por INSERT multi-linha
+BATCH_SIZE = 1000
+
+_UPSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+
+def _add(deltas: dict, relation: str, player_ids, other_ids, pts_for: int, pts_against: int, sign: int):
+    for pid in player_ids:
+        for other in other_ids:
+            if other == pid:
+                continue
+            d = deltas.setdefault((relation, pid, other), [0] * len(COLUMNS))
+            d[0] += sign
+            d[1] += sign * (pts_for > pts_against)
+            d[2] += sign * (pts_for == pts_against)
+            d[3] += sign * (pts_for - pts_against)
+
+
+def match_delta(deltas: dict, match: Match, old=None, new=None):
+    """Acumula em deltas ({(relação, jogador, outro): [jogos, vitórias, empates,
+    diferença de pontos]}) a diferença entre o resultado antigo e o novo de um jogo.
+
+    old/new são tuplos (pontos A, pontos B); None quando o jogo é criado/eliminado.
+    """
+    team_a, team_b = match.team_a_ids, match.team_b_ids
+
+    for score, sign in ((old, -1), (new, 1)):
+        if score is None:
+            continue
+        points_a, points_b = score
+        _add(deltas, PARTNER, team_a, team_a, points_a, points_b, sign)
+        _add(deltas, PARTNER, team_b, team_b, points_b, points_a, sign)
+        _add(deltas, OPPONENT, team_a, team_b, points_a, points_b, sign)
+        _add(deltas, OPPONENT, team_b, team_a, points_b, points_a, sign)
+
+
+def apply_deltas(db: Session, competition_id: str, deltas: dict):
+    """Soma os deltas às estatísticas dos pares (upsert, sem commit) e remove
+    os pares que ficaram sem jogos"""
+    values = [
+        {"competition_id": competition_id, **dict(zip(KEY, key)), **dict(zip(COLUMNS, d))}
+        for key, d in deltas.items() if any(d)
+    ]
+    if not values:
+        return
+
+    upsert = _UPSERTS[db.get_bind().dialect.name]
+    for i in range(0, len(values), BATCH_SIZE):
+        stmt = upsert(PairStat).values(values[i:i + BATCH_SIZE])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[PairStat.competition_id, PairStat.relation,
+                            PairStat.player_id, PairStat.other_id],
+            set_={col: getattr(PairStat, col) + stmt.excluded[col] for col in COLUMNS}
+        ))
+
+    if any(v["games"] < 0 for v in values):
+        db.execute(delete(PairStat).where(
+            PairStat.competition_id == competition_id, PairStat.games <= 0
+        ))
+
+
+def pair_row(**stats) -> dict:
+    """Linha de um par com as colunas derivadas (derrotas, % de vitórias)"""
+    games = stats["games"]
+    return {
+        **stats,
+        "losses": games - stats["wins"] - stats["ties"],
+        "win_rate": round(stats["wins"] / games * 100, 1) if games else 0,
+    }
+
+
+def get_top(db: Session, competition_id: str, relation: str, limit: int) -> list[dict]:
+    """Os limit pares da competição com mais vitórias (desempate pela diferença de
+    pontos), lidos pelo índice ix_pair_stats_top. Parcerias aparecem uma só vez;
+    confrontos no sentido do vencedor (quem ganhou mais vezes a quem)."""
+    p = PairStat
+    player, other = aliased(Player), aliased(Player)
+
+    query = (
+        select(
+            p.player_id, player.name.label("player_name"),
+            p.other_id, other.name.label("other_name"),
+            *(getattr(p, col) for col in COLUMNS)
+        )
+        .join(player, player.id == p.player_id)
+        .join(other, other.id == p.other_id)
+        .where(p.competition_id == competition_id, p.relation == relation)
+        .order_by(p.wins.desc(), p.point_diff.desc(), p.player_id, p.other_id)
+        .limit(limit)
+    )
+    if relation == PARTNER:
+        query = query.where(p.player_id < p.other_id)
+    else:
+        # cada confronto está guardado nos dois sentidos: fica o de quem ganhou mais
+        # vezes (vitórias > derrotas) e, com o confronto empatado, o de menor id
+        balance = 2 * p.wins + p.ties - p.games
+        query = query.where(or_(balance > 0, and_(balance == 0, p.player_id < p.other_id)))
+
+    return [pair_row(**row) for row in db.execute(query).mappings()]
+
+
+def get_player_pairs(db: Session, player_id: str, relation: str, limit: int,
+                     competition_id: str = None) -> list[dict]:
+    """Os limit parceiros/adversários do jogador com mais vitórias, somando todas
+    as competições (ou só uma), pelo índice ix_pair_stats_player"""
+    p = PairStat
+    wins, point_diff = func.sum(p.wins), func.sum(p.point_diff)
+
+    query = (
+        select(
+            p.other_id, Player.name.label("other_name"),
+            func.sum(p.games).label("games"), wins.label("wins"),
+            func.sum(p.ties).label("ties"), point_diff.label("point_diff"),
+        )
+        .join(Player, Player.id == p.other_id)
+        .where(p.player_id == player_id, p.relation == relation)
+        .group_by(p.other_id, Player.name)
+        .order_by(wins.desc(), point_diff.desc(), p.other_id)
+        .limit(limit)
+    )
+    if competition_id:
+        query = query.where(p.competition_id == competition_id)
+
+    return [pair_row(player_id=player_id, **row) for row in db.execute(query).mappings()]
+
+
+def rebuild(db: Session, competition_id: str = None) -> int:
+    """Recalcula as estatísticas dos pares a partir dos jogos (sem commit)"""
+    mp, other = aliased(MatchPlayer), aliased(MatchPlayer)
+    pts_for = case((mp.team == "A", Match.points_team_a), else_=Match.points_team_b)
+    pts_against = case((mp.team == "A", Match.points_team_b), else_=Match.points_team_a)
+    relation = case((mp.team == other.team, PARTNER), else_=OPPONENT)
+
+    query = (
+        select(
+            GameDay.competition_id,
+            relation,
+            mp.player_id,
+            other.player_id,
+            func.count(),
+            func.sum(case((pts_for > pts_against, 1), else_=0)),
+            func.sum(case((pts_for == pts_against, 1), else_=0)),
+            func.sum(pts_for - pts_against),
+        )
+        .select_from(mp)
+        .join(other, and_(other.match_id == mp.match_id, other.player_id != mp.player_id))
+        .join(Match, Match.id == mp.match_id)
+        .join(GameDay, GameDay.id == Match.game_day_id)
+        .group_by(GameDay.competition_id, relation, mp.player_id, other.player_id)
+    )
+
+    stmt = delete(PairStat)
+    if competition_id:
+        query = query.where(GameDay.competition_id == competition_id)
+        stmt = stmt.where(PairStat.competition_id == competition_id)
+    db.execute(stmt)
+
+    total, values = 0, []
+    for row in db.execute(query):
+        values.append({"competition_id": row[0], **dict(zip(KEY + COLUMNS, row[1:]))})
+        if len(values) >= BATCH_SIZE:
+            db.execute(PairStat.__table__.insert(), values)
+            total += len(values)
+            values = []
+    if values:
+        db.execute(PairStat.__table__.insert(), values)
+        total += len(values)
+    return total
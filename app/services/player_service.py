@@ -1,9 +1,91 @@
+import time
+from datetime import date
+from sqlalchemy import and_, case, func, select, tuple_
 from sqlalchemy.orm import Session
+from app.models.competition import Competition
+from app.models.game_day import GameDay
 from app.models.player import Player
+from app.models.match import Match, MatchPlayer
+from app.models.rating import PlayerRating
+
+PAGE_SIZE = 50
+HISTORY_PAGE_SIZE = 30
+
+# Lista de jogadores (id, nome) em cache por processo; invalidada quando
+# um jogador é criado/editado/eliminado e, noutros workers, ao fim de ROSTER_TTL
+ROSTER_TTL = 60
+_roster = None
+_roster_loaded_at = 0.0
 
 def get_all(db: Session):
     return db.query(Player).all()
 
+def get_page(db: Session, page: int = 1, per_page: int = PAGE_SIZE):
+    """Devolve (jogadores da página ordenados por nome, total de páginas)"""
+    total = db.query(func.count(Player.id)).scalar()
+    pages = max(1, -(-total // per_page))
+
+    players = (
+        db.query(Player)
+        .order_by(Player.name, Player.id)
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
+    return players, pages
+
+def get_rows_after(db: Session, after: str = None, limit: int = PAGE_SIZE):
+    """Jogadores ordenados por nome como dicionários (projeção Core, sem ORM).
+
+    Paginação por keyset: after é o id do último jogador da página anterior;
+    ValueError se não existir. Devolve (jogadores, cursor da página seguinte ou None).
+    """
+    query = select(Player.id, Player.name, Player.sexo, Player.nivel, Player.data_nascimento)
+
+    if after:
+        after_name = db.execute(select(Player.name).where(Player.id == after)).scalar()
+        if after_name is None:
+            raise ValueError(f"Cursor inválido: {after}")
+        query = query.where(tuple_(Player.name, Player.id) > tuple_(after_name, after))
+
+    rows = db.execute(query.order_by(Player.name, Player.id).limit(limit + 1)).mappings().all()
+
+    players = [dict(row) for row in rows[:limit]]
+    next_cursor = players[-1]["id"] if len(rows) > limit else None
+    return players, next_cursor
+
+def count_games(db: Session, player_ids):
+    """Número de jogos por jogador (GROUP BY sobre o índice de match_players.player_id)"""
+    games = {pid: 0 for pid in player_ids}
+    games.update(
+        db.query(MatchPlayer.player_id, func.count())
+        .filter(MatchPlayer.player_id.in_(player_ids))
+        .group_by(MatchPlayer.player_id)
+        .all()
+    )
+    return games
+
+def has_matches(db: Session, player_id: str) -> bool:
+    return db.query(
+        db.query(MatchPlayer).filter(MatchPlayer.player_id == player_id).exists()
+    ).scalar()
+
+def get_roster(db: Session):
+    """Todos os jogadores ordenados por nome, como dicionários {id, name}"""
+    global _roster, _roster_loaded_at
+
+    if _roster is None or time.monotonic() - _roster_loaded_at > ROSTER_TTL:
+        _roster = [
+            {"id": pid, "name": name}
+            for pid, name in db.query(Player.id, Player.name).order_by(Player.name)
+        ]
+        _roster_loaded_at = time.monotonic()
+    return _roster
+
+def invalidate_roster():
+    global _roster
+    _roster = None
+
 def get_by_id(db: Session, player_id: str):
     return db.query(Player).filter(Player.id == player_id).first()
 
@@ -12,6 +94,7 @@ def create(db: Session, name: str):
     db.add(player)
     db.commit()
     db.refresh(player)
+    invalidate_roster()
     return player
 
 def update(db: Session, player_id: str, name: str):
@@ -20,4 +103,140 @@ def update(db: Session, player_id: str, name: str):
         player.name = name
         db.commit()
         db.refresh(player)
+        invalidate_roster()
     return player
+
+def _history_cursor(row) -> str:
+    return f"{row['date'].isoformat()}_{row['game_day_id']}_{row['order']}_{row['court']}"
+
+def _parse_history_cursor(after: str) -> tuple:
+    after_date, day_id, order, court = after.split("_", 3)
+    return date.fromisoformat(after_date), day_id, int(order), int(court)
+
+def _points(mp):
+    pts_for = case((mp.team == "A", Match.points_team_a), else_=Match.points_team_b)
+    pts_against = case((mp.team == "A", Match.points_team_b), else_=Match.points_team_a)
+    return pts_for, pts_against
+
+def _before(key: tuple):
+    """Jogos anteriores a key em (data, dia, ronda, campo), pelas colunas copiadas
+    para match_players; a condição só na data deixa percorrer o índice"""
+    mp = MatchPlayer
+    return and_(mp.date <= key[0], tuple_(mp.date, mp.game_day_id, mp.order, mp.court) < tuple_(*key))
+
+def _totals_before(db: Session, player_id: str, competition_ids, key: tuple) -> dict:
+    """Totais do jogador em cada competição com os jogos anteriores a key.
+    Só lê, pelo índice ix_match_players_timeline, os jogos do jogador desde o
+    primeiro dia dessas competições: o custo depende da duração das competições,
+    não do histórico todo do jogador."""
+    first_day = (
+        select(func.min(GameDay.date))
+        .where(GameDay.competition_id.in_(competition_ids))
+        .scalar_subquery()
+    )
+    pts_for, pts_against = _points(MatchPlayer)
+    rows = db.execute(
+        select(
+            GameDay.competition_id,
+            func.count(),
+            func.sum(case((pts_for > pts_against, 1), else_=0)),
+            func.sum(case((pts_for == pts_against, 1), else_=0)),
+            func.sum(case((pts_for < pts_against, 1), else_=0)),
+            func.sum(pts_for),
+            func.sum(pts_against),
+        )
+        .select_from(MatchPlayer)
+        .join(Match, Match.id == MatchPlayer.match_id)
+        .join(GameDay, GameDay.id == Match.game_day_id)
+        .where(
+            MatchPlayer.player_id == player_id,
+            MatchPlayer.date >= first_day,
+            _before(key),
+            GameDay.competition_id.in_(competition_ids),
+        )
+        .group_by(GameDay.competition_id)
+    )
+    return {cid: list(values) for cid, *values in rows}
+
+def _history_query(player_id: str):
+    """Jogos do jogador, do mais recente para o mais antigo, lidos por ordem do
+    índice ix_match_players_timeline (sem ordenar o histórico antes do LIMIT).
+    O rating no fim do dia vem de player_ratings por outer join: um dia sem
+    rating calculado não esconde jogos."""
+    pr, mp = PlayerRating, MatchPlayer
+    pts_for, pts_against = _points(mp)
+    return (
+        select(
+            Match.id, mp.date, mp.game_day_id, GameDay.competition_id,
+            Competition.name.label("competition_name"), GameDay.group_name,
+            mp.order, mp.court, mp.team,
+            pts_for.label("points_for"), pts_against.label("points_against"),
+            pr.rating,
+        )
+        .select_from(mp)
+        .join(Match, Match.id == mp.match_id)
+        .join(GameDay, GameDay.id == mp.game_day_id)
+        .join(Competition, Competition.id == GameDay.competition_id)
+        .outerjoin(pr, and_(pr.player_id == mp.player_id, pr.game_day_id == mp.game_day_id))
+        # o intervalo na data leva o SQLite a usar o índice também na primeira página
+        .where(mp.player_id == player_id, mp.date <= date.max)
+        .order_by(mp.date.desc(), mp.game_day_id.desc(), mp.order.desc(), mp.court.desc())
+    )
+
+def get_history(db: Session, player_id: str, after: str = None, limit: int = HISTORY_PAGE_SIZE):
+    """Jogos do jogador em todas as competições, mais recentes primeiro, com os
+    totais acumulados na competição até cada jogo e o rating no fim do dia.
+
+    Paginação por keyset em (data do dia, dia, ronda, campo), sem OFFSET: after
+    é o cursor devolvido pela página anterior; ValueError se for inválido.
+    Devolve (jogos, cursor da página seguinte ou None).
+    """
+    query = _history_query(player_id)
+    if after:
+        key = _parse_history_cursor(after)
+        query = query.where(_before(key))
+
+    rows = db.execute(query.limit(limit + 1)).mappings().all()
+    matches = [
+        {
+            **row, "rating": round(row["rating"]) if row["rating"] is not None else None,
+            "partners": [], "opponents": [],
+        }
+        for row in rows[:limit]
+    ]
+    if not matches:
+        return [], None
+
+    teams = db.execute(
+        select(MatchPlayer.match_id, MatchPlayer.team, Player.id, Player.name)
+        .join(Player, Player.id == MatchPlayer.player_id)
+        .where(MatchPlayer.match_id.in_([m["id"] for m in matches]), MatchPlayer.player_id != player_id)
+        .order_by(Player.name)
+    )
+    by_id = {m["id"]: m for m in matches}
+    for match_id, team, pid, name in teams:
+        match = by_id[match_id]
+        match["partners" if team == match["team"] else "opponents"].append({"id": pid, "name": name})
+
+    # totais acumulados: do mais antigo da página para o mais recente
+    oldest = matches[-1]
+    totals = _totals_before(
+        db, player_id, {m["competition_id"] for m in matches},
+        (oldest["date"], oldest["game_day_id"], oldest["order"], oldest["court"])
+    )
+    for match in reversed(matches):
+        t = totals.setdefault(match["competition_id"], [0] * 6)
+        pts_for, pts_against = match["points_for"], match["points_against"]
+        t[0] += 1
+        t[1] += pts_for > pts_against
+        t[2] += pts_for == pts_against
+        t[3] += pts_for < pts_against
+        t[4] += pts_for
+        t[5] += pts_against
+        match["result"] = "W" if pts_for > pts_against else "T" if pts_for == pts_against else "L"
+        match["totals"] = dict(zip(
+            ("games", "wins", "ties", "losses", "points_for", "points_against"), t
+        ))
+
+    next_cursor = _history_cursor(oldest) if len(rows) > limit else None
+    return matches, next_cursor
@@ -1,21 +1,128 @@
+import numpy as np
 from sqlalchemy.orm import Session
-from app.models.match import Match
+from app.models.match import Match, MatchPlayer
 from app.models.game_day import GameDay
+from app.models.player import Player
 
-def get_ranking(db: Session, competition_id: str):
-    totals = {}
+COLUMNS = ("games", "wins", "ties", "losses", "points_for", "points_against")
+DEFAULT_SORT = ("points", "win_rate")
 
-    matches = (
-        db.query(Match)
-        .join(GameDay)
-        .filter(GameDay.competition_id == competition_id)
+
+class MatchBatch:
+    """Lote colunar de jogos em arrays NumPy, com uma posição por (jogo, jogador):
+    índice do jogador (player_ids[i] -> id), equipa (True = B) e pontos de cada
+    equipa no jogo."""
+
+    def __init__(self, player_ids=(), player=(), team_b=(), points_a=(), points_b=()):
+        self.player_ids = list(player_ids)
+        self.player = np.asarray(player, dtype=np.intp)
+        self.team_b = np.asarray(team_b, dtype=bool)
+        self.points_a = np.asarray(points_a, dtype=np.int64)
+        self.points_b = np.asarray(points_b, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.player)
+
+    @classmethod
+    def from_slots(cls, player_ids, team_b, points_a, points_b):
+        """Lote a partir das colunas por (jogo, jogador), com os ids dos jogadores"""
+        index = {}
+        player = [index.setdefault(pid, len(index)) for pid in player_ids]
+        return cls(index, player, team_b, points_a, points_b)
+
+    @classmethod
+    def from_matches(cls, matches):
+        player_ids, sizes_a, sizes_b, points_a, points_b = [], [], [], [], []
+        for m in matches:
+            team_a, team_b = m.team_a_ids, m.team_b_ids
+            player_ids += team_a
+            player_ids += team_b
+            sizes_a.append(len(team_a))
+            sizes_b.append(len(team_b))
+            points_a.append(m.points_team_a)
+            points_b.append(m.points_team_b)
+
+        # expande as colunas por jogo para uma posição por jogador
+        sizes_a, sizes_b = np.array(sizes_a, dtype=np.intp), np.array(sizes_b, dtype=np.intp)
+        sizes = sizes_a + sizes_b
+        first = np.repeat(np.cumsum(sizes) - sizes, sizes)
+        team_b = np.arange(sizes.sum()) - first >= np.repeat(sizes_a, sizes)
+        return cls.from_slots(
+            player_ids, team_b, np.repeat(points_a, sizes), np.repeat(points_b, sizes)
+        )
+
+
+def compute_standings(batch: MatchBatch) -> dict:
+    """Agrega o lote numa coluna (lista indexada por jogador) por estatística,
+    com np.bincount sobre os índices dos jogadores"""
+    n = len(batch.player_ids)
+    pts_for = np.where(batch.team_b, batch.points_b, batch.points_a)
+    pts_against = np.where(batch.team_b, batch.points_a, batch.points_b)
+
+    def total(weights=None):
+        return np.bincount(batch.player, weights, minlength=n).astype(np.int64).tolist()
+
+    return {
+        "player_id": batch.player_ids,
+        "games": total(),
+        "wins": total(pts_for > pts_against),
+        "ties": total(pts_for == pts_against),
+        "losses": total(pts_for < pts_against),
+        "points_for": total(pts_for),
+        "points_against": total(pts_against),
+    }
+
+
+def standing_row(**stats) -> dict:
+    """Linha de classificação com as colunas derivadas usadas nos templates"""
+    games = stats["games"]
+    win_rate = (stats["wins"] / games * 100) if games else 0
+
+    return {
+        **stats,
+        "record": f"{stats['wins']} - {stats['ties']} - {stats['losses']}",
+        "points": stats["points_for"],
+        "win_rate": round(win_rate, 1),
+    }
+
+
+def rank(standings: dict, names: dict = None, sort_keys=DEFAULT_SORT, top: int = None) -> list[dict]:
+    """Ordena a classificação (descendente pelas sort_keys) e devolve os top primeiros"""
+    rows = []
+    for values in zip(*(standings[col] for col in ("player_id",) + COLUMNS)):
+        row = standing_row(**dict(zip(("player_id",) + COLUMNS, values)))
+        if names is not None:
+            row["name"] = names[row["player_id"]]
+        rows.append(row)
+
+    rows.sort(key=lambda r: tuple(r[k] for k in sort_keys), reverse=True)
+    return rows[:top] if top is not None else rows
+
+
+def load_batch(db: Session, *filters) -> MatchBatch:
+    """Carrega os jogos que satisfazem os filtros num lote, com uma única query"""
+    rows = (
+        db.query(MatchPlayer.team, MatchPlayer.player_id, Match.points_team_a, Match.points_team_b)
+        .join(Match, Match.id == MatchPlayer.match_id)
+        .join(GameDay, GameDay.id == Match.game_day_id)
+        .filter(*filters)
         .all()
     )
 
-    for m in matches:
-        for pid in m.team_a_players.split(","):
-            totals[pid] = totals.get(pid, 0) + m.points_team_a
-        for pid in m.team_b_players.split(","):
-            totals[pid] = totals.get(pid, 0) + m.points_team_b
+    if not rows:
+        return MatchBatch()
+    teams, player_ids, points_a, points_b = zip(*rows)
+    return MatchBatch.from_slots(player_ids, [t == "B" for t in teams], points_a, points_b)
+
+
+def get_ranking(db: Session, competition_id: str, sort_keys=DEFAULT_SORT, top: int = None):
+    batch = load_batch(db, GameDay.competition_id == competition_id)
+    return rank(compute_standings(batch), sort_keys=sort_keys, top=top)
 
-    return sorted(totals.items(), key=lambda x: x[1], reverse=True)
+
+def get_game_day_ranking(db: Session, game_day_id: str):
+    batch = load_batch(db, Match.game_day_id == game_day_id)
+    names = dict(
+        db.query(Player.id, Player.name).filter(Player.id.in_(batch.player_ids)).all()
+    )
+    return rank(compute_standings(batch), names)
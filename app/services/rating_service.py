@@ -0,0 +1,242 @@
+import math
+from sqlalchemy import and_, delete, func, insert, select, tuple_
+from sqlalchemy.orm import Session
+from app.models.game_day import GameDay
+from app.models.match import Match, MatchPlayer
+from app.models.rating import PlayerRating
+
+# Glicko (Glickman, 1999) adaptado a pares: cada equipa joga como um só jogador
+# com a média dos ratings e dos RD² dos seus jogadores. Os jogos são aplicados
+# um a um, por ordem cronológica (data do dia, ronda, campo).
+INITIAL_RATING = 1500.0
+INITIAL_RD = 350.0
+MIN_RD = 30.0
+# Incerteza que volta a crescer com a inatividade: RD² += RD_GROWTH² a cada RD_GROWTH_DAYS
+RD_GROWTH = 35.0
+RD_GROWTH_DAYS = 30
+
+# Linhas lidas do cursor / inseridas de cada vez
+YIELD_PER = 5000
+BATCH_SIZE = 1000
+# Chave do advisory lock (PostgreSQL) que serializa as escritas em player_ratings
+REPLAY_LOCK = 0x70616465
+
+_Q = math.log(10) / 400
+
+
+def _g(rd: float) -> float:
+    return 1 / math.sqrt(1 + 3 * (_Q * rd) ** 2 / math.pi ** 2)
+
+
+class RatingEngine:
+    """Estado de cada jogador ([rating, rd, jogos, data do último jogo]) a um dado
+    momento da história; play_day() avança-o um dia de jogo"""
+
+    def __init__(self, states: dict = None):
+        self.states = states if states is not None else {}
+
+    def _state(self, player_id: str) -> list:
+        state = self.states.get(player_id)
+        if state is None:
+            state = self.states[player_id] = [INITIAL_RATING, INITIAL_RD, 0, None]
+        return state
+
+    def play_day(self, game_day_id: str, day, matches) -> list[dict]:
+        """Aplica os jogos do dia ([(equipa A, equipa B, pontos A, pontos B)], pela ordem
+        em que foram jogados) e devolve o rating de cada jogador no fim do dia"""
+        player_ids = list(dict.fromkeys(pid for a, b, _, _ in matches for pid in a + b))
+
+        for pid in player_ids:
+            state = self._state(pid)
+            if state[3] is not None:
+                idle = (day - state[3]).days / RD_GROWTH_DAYS
+                state[1] = min(math.sqrt(state[1] ** 2 + RD_GROWTH ** 2 * idle), INITIAL_RD)
+
+        for team_a, team_b, points_a, points_b in matches:
+            score_a = 1.0 if points_a > points_b else 0.5 if points_a == points_b else 0.0
+            self._play([self._state(p) for p in team_a], [self._state(p) for p in team_b], score_a)
+
+        rows = []
+        for pid in player_ids:
+            state = self.states[pid]
+            state[3] = day
+            rows.append({
+                "player_id": pid,
+                "game_day_id": game_day_id,
+                "date": day,
+                "rating": state[0],
+                "rd": state[1],
+                "games": state[2],
+            })
+        return rows
+
+    @staticmethod
+    def _team(states):
+        return (
+            sum(s[0] for s in states) / len(states),
+            math.sqrt(sum(s[1] ** 2 for s in states) / len(states)),
+        )
+
+    def _play(self, team_a, team_b, score_a: float):
+        rating_a, rd_a = self._team(team_a)
+        rating_b, rd_b = self._team(team_b)
+
+        updates = []
+        for states, own, opponent, opponent_rd, score in (
+            (team_a, rating_a, rating_b, rd_b, score_a),
+            (team_b, rating_b, rating_a, rd_a, 1 - score_a),
+        ):
+            g = _g(opponent_rd)
+            expected = 1 / (1 + 10 ** (-g * (own - opponent) / 400))
+            d2_inv = _Q ** 2 * g ** 2 * expected * (1 - expected)
+            for state in states:
+                precision = 1 / state[1] ** 2 + d2_inv
+                updates.append((
+                    state,
+                    state[0] + _Q / precision * g * (score - expected),
+                    max(math.sqrt(1 / precision), MIN_RD),
+                ))
+
+        # as duas equipas são atualizadas com os valores de antes do jogo
+        for state, rating, rd in updates:
+            state[0], state[1] = rating, rd
+            state[2] += 1
+
+
+def _iter_days(db: Session, start=None):
+    """(id do dia, data, jogos) por ordem cronológica, a partir da chave (data, id)
+    start inclusive; lê (jogo, jogador) com yield_per, sem carregar a história toda"""
+    query = (
+        select(
+            GameDay.id, GameDay.date, Match.id,
+            Match.points_team_a, Match.points_team_b, MatchPlayer.team, MatchPlayer.player_id
+        )
+        .join(Match, Match.game_day_id == GameDay.id)
+        .join(MatchPlayer, MatchPlayer.match_id == Match.id)
+        .order_by(GameDay.date, GameDay.id, Match.order, Match.court, Match.id)
+        .execution_options(yield_per=YIELD_PER)
+    )
+    if start is not None:
+        query = query.where(Match.game_day_id.in_(_days_from(start)))
+
+    day_id, day, matches = None, None, []
+    current, teams, scores = None, None, None
+    for gd_id, gd_date, match_id, points_a, points_b, team, player_id in db.execute(query):
+        if match_id != current:
+            if current is not None:
+                matches.append((teams["A"], teams["B"], *scores))
+            if gd_id != day_id:
+                if day_id is not None:
+                    yield day_id, day, matches
+                day_id, day, matches = gd_id, gd_date, []
+            current, teams, scores = match_id, {"A": [], "B": []}, (points_a, points_b)
+        teams[team].append(player_id)
+
+    if current is not None:
+        matches.append((teams["A"], teams["B"], *scores))
+        yield day_id, day, matches
+
+
+def _from_day(date_column, id_column, start):
+    """(data, id) >= start; a condição só na data deixa usar os índices por data"""
+    return and_(date_column >= start[0], tuple_(date_column, id_column) >= tuple_(*start))
+
+
+def _days_from(start):
+    """Ids dos dias a partir de start, como subquery: os jogos são depois procurados
+    pelo índice de matches.game_day_id (sem percorrer match_players inteira)"""
+    return select(GameDay.id).where(_from_day(GameDay.date, GameDay.id, start))
+
+
+def _latest(db: Session, player_ids, start=None) -> dict:
+    """Último estado de cada jogador ({id: [rating, rd, jogos, data]}), antes do dia
+    start se indicado. GROUP BY sobre o índice (player_id, date) em vez de uma
+    window function, que teria de ordenar a história toda destes jogadores."""
+    p = PlayerRating
+    conditions = [p.player_id.in_(player_ids)]
+    if start is not None:
+        conditions += [p.date <= start[0], tuple_(p.date, p.game_day_id) < tuple_(*start)]
+
+    last_date = (
+        select(p.player_id, func.max(p.date).label("date"))
+        .where(*conditions)
+        .group_by(p.player_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(p.player_id, p.rating, p.rd, p.games, p.date)
+        .join(last_date, and_(last_date.c.player_id == p.player_id, last_date.c.date == p.date))
+        .where(*conditions)
+        .order_by(p.game_day_id)
+    )
+    # com dois dias na mesma data fica o de maior id (a ordem do replay)
+    return {pid: [rating, rd, games, day] for pid, rating, rd, games, day in rows}
+
+
+def _replay(db: Session, engine: RatingEngine, days) -> int:
+    rows, total = [], 0
+    for game_day_id, day, matches in days:
+        rows += engine.play_day(game_day_id, day, matches)
+        if len(rows) >= BATCH_SIZE:
+            db.execute(insert(PlayerRating), rows)
+            total += len(rows)
+            rows = []
+    if rows:
+        db.execute(insert(PlayerRating), rows)
+        total += len(rows)
+    return total
+
+
+def lock(db: Session):
+    """Serializa até ao fim da transação as escritas que refazem os ratings.
+
+    O replay apaga e volta a inserir os ratings a partir de um dia, para todas as
+    competições: em PostgreSQL (READ COMMITTED) dois replays em paralelo não veem
+    as linhas um do outro e o segundo INSERT falha com chave duplicada. Chamar
+    antes da primeira escrita da transação (jogos, classificação, cache), para
+    que todas as transações adquiram os locks pela mesma ordem. Em SQLite as
+    escritas já são serializadas pela base de dados.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(REPLAY_LOCK)))
+
+
+def replay_from(db: Session, *game_day_ids) -> int:
+    """Recalcula os ratings a partir do mais antigo dos dias indicados (inclusive),
+    depois de jogos desses dias terem sido criados, alterados ou eliminados.
+
+    Só os dias seguintes são revistos; o estado de partida de cada jogador é o seu
+    último rating anterior. Sem commit; devolve o nº de linhas escritas.
+    """
+    lock(db)
+    starts = db.query(GameDay.date, GameDay.id).filter(GameDay.id.in_(game_day_ids)).all()
+    if not starts:
+        return 0
+    start = min(tuple(row) for row in starts)
+
+    players = db.execute(
+        select(MatchPlayer.player_id).distinct()
+        .join(Match, Match.id == MatchPlayer.match_id)
+        .where(Match.game_day_id.in_(_days_from(start)))
+    ).scalars().all()
+    engine = RatingEngine(_latest(db, players, start))
+
+    db.execute(delete(PlayerRating).where(
+        _from_day(PlayerRating.date, PlayerRating.game_day_id, start)
+    ))
+    return _replay(db, engine, _iter_days(db, start))
+
+
+def rebuild(db: Session) -> int:
+    """Recalcula todos os ratings a partir do primeiro jogo (sem commit)"""
+    lock(db)
+    db.execute(delete(PlayerRating))
+    return _replay(db, RatingEngine(), _iter_days(db))
+
+
+def get_current(db: Session, player_ids) -> dict:
+    """Rating atual ({rating, rd, games}) de cada jogador que já jogou"""
+    return {
+        pid: {"rating": round(rating), "rd": round(rd), "games": games}
+        for pid, (rating, rd, games, _) in _latest(db, player_ids).items()
+    }
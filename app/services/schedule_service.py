@@ -0,0 +1,251 @@
+from datetime import date, datetime, time, timedelta
+import random
+import uuid
+from sqlalchemy import and_, func
+from sqlalchemy.orm import aliased
+from app.models.game_day import GameDay
+from app.models.match import Match, MatchPlayer
+
+# Horário por omissão de um dia de jogo
+START_TIME = time(9, 0)
+ROUND_DURATION = timedelta(minutes=20)
+
+
+class ScheduledMatch:
+    """Jogo gerado mas ainda não gravado.
+
+    Tem os mesmos atributos que Match usa nos templates e nos serviços de
+    classificação, por isso pode ser mostrado (pré-visualização) ou gravado
+    diretamente com insert_matches.
+    """
+    __slots__ = (
+        "id", "order", "court", "scheduled_at",
+        "team_a_ids", "team_b_ids", "points_team_a", "points_team_b"
+    )
+
+    def __init__(self, order: int, court: int, scheduled_at: datetime, team_a_ids, team_b_ids,
+                 points_team_a: int = 0, points_team_b: int = 0):
+        self.id = str(uuid.uuid4())
+        self.order = order
+        self.court = court
+        self.scheduled_at = scheduled_at
+        self.team_a_ids = list(team_a_ids)
+        self.team_b_ids = list(team_b_ids)
+        self.points_team_a = points_team_a
+        self.points_team_b = points_team_b
+
+
+def round_robin(player_ids: list[str], num_courts: int, day: date,
+                start_time: time = START_TIME, round_duration: timedelta = ROUND_DURATION):
+    """Round-robin (circle method): cada jogador faz par com todos os outros uma vez.
+
+    Exige len(player_ids) == num_courts * 4. Não acede à base de dados.
+    """
+    num_players = len(player_ids)
+    if num_players != num_courts * 4:
+        raise ValueError(f"Esperados {num_courts * 4} jogadores, recebidos {num_players}")
+
+    fixed = player_ids[-1]
+    rotating = list(player_ids[:-1])
+    start = datetime.combine(day, start_time)
+
+    matches = []
+    for round_number in range(1, num_players):
+        round_players = rotating + [fixed]
+
+        pairs = [
+            (round_players[i], round_players[-(i + 1)])
+            for i in range(num_players // 2)
+        ]
+
+        # Agrupar pares em jogos (2 pares = 1 campo)
+        for court_index in range(num_courts):
+            matches.append(ScheduledMatch(
+                order=round_number,
+                court=court_index + 1,
+                scheduled_at=start + (round_number - 1) * round_duration,
+                team_a_ids=pairs[court_index * 2],
+                team_b_ids=pairs[court_index * 2 + 1],
+            ))
+
+        # 🔄 rodar jogadores (menos o fixo)
+        rotating = [rotating[-1]] + rotating[:-1]
+
+    return matches
+
+
+# ---------- Mixer (Americano/Mexicano) ----------
+
+DEFAULT_ROUNDS = 7
+MAX_SWAPS = 50_000  # tentativas de troca para o dia inteiro
+
+PARTNER_WEIGHT = 10
+OPPONENT_WEIGHT = 3
+LEVEL_WEIGHT = 1
+
+# As 3 formas de dividir 4 jogadores de um campo em duas equipas
+_SPLITS = ((0, 1, 2, 3), (0, 2, 1, 3), (0, 3, 1, 2))
+
+
+def parse_level(nivel: str):
+    """'M2' -> 2; None se o nível não tiver número"""
+    digits = "".join(ch for ch in (nivel or "") if ch.isdigit())
+    return int(digits) if digits else None
+
+
+def load_history(db, competition_id: str):
+    """Parcerias e confrontos já jogados na competição.
+
+    Devolve (partners, opponents): dicionários {(id_a, id_b): n} com id_a < id_b.
+    """
+    a = aliased(MatchPlayer)
+    b = aliased(MatchPlayer)
+    same_team = a.team == b.team
+
+    rows = (
+        db.query(a.player_id, b.player_id, same_team, func.count())
+        .join(b, and_(a.match_id == b.match_id, a.player_id < b.player_id))
+        .join(Match, Match.id == a.match_id)
+        .join(GameDay, GameDay.id == Match.game_day_id)
+        .filter(GameDay.competition_id == competition_id)
+        .group_by(a.player_id, b.player_id, same_team)
+        .all()
+    )
+
+    partners, opponents = {}, {}
+    for pa, pb, is_partner, n in rows:
+        (partners if is_partner else opponents)[(pa, pb)] = n
+    return partners, opponents
+
+
+class _MixerState:
+    """Contadores de parcerias/confrontos indexados por inteiro (matrizes n x n)"""
+
+    def __init__(self, player_ids, partners, opponents, levels):
+        n = len(player_ids)
+        index = {pid: i for i, pid in enumerate(player_ids)}
+
+        self.partners = [[0] * n for _ in range(n)]
+        self.opponents = [[0] * n for _ in range(n)]
+        for source, matrix in ((partners, self.partners), (opponents, self.opponents)):
+            for (pa, pb), count in (source or {}).items():
+                if pa in index and pb in index:
+                    i, j = index[pa], index[pb]
+                    matrix[i][j] = matrix[j][i] = count
+
+        known = [v for v in (levels or {}).values() if v is not None]
+        default = sum(known) / len(known) if known else 0
+        self.levels = [
+            (levels or {}).get(pid) if (levels or {}).get(pid) is not None else default
+            for pid in player_ids
+        ]
+        self.games = [0] * n
+        self.swaps = 0  # trocas tentadas pela pesquisa local
+
+    def split_cost(self, a1, a2, b1, b2):
+        p, o, lv = self.partners, self.opponents, self.levels
+        return (
+            PARTNER_WEIGHT * (p[a1][a2] + p[b1][b2])
+            + OPPONENT_WEIGHT * (o[a1][b1] + o[a1][b2] + o[a2][b1] + o[a2][b2])
+            + LEVEL_WEIGHT * abs(lv[a1] + lv[a2] - lv[b1] - lv[b2])
+        )
+
+    def court_cost(self, court):
+        """Custo da melhor divisão em equipas dos 4 jogadores do campo"""
+        return min(
+            self.split_cost(court[i], court[j], court[k], court[l])
+            for i, j, k, l in _SPLITS
+        )
+
+    def best_split(self, court):
+        i, j, k, l = min(
+            _SPLITS,
+            key=lambda s: self.split_cost(court[s[0]], court[s[1]], court[s[2]], court[s[3]])
+        )
+        return (court[i], court[j]), (court[k], court[l])
+
+    def record(self, team_a, team_b):
+        p, o = self.partners, self.opponents
+        for x, y in (team_a, team_b):
+            p[x][y] += 1
+            p[y][x] += 1
+        for x in team_a:
+            for y in team_b:
+                o[x][y] += 1
+                o[y][x] += 1
+        for x in team_a + team_b:
+            self.games[x] += 1
+
+
+def _search_round(state: _MixerState, playing: list[int], num_courts: int, rng, max_swaps: int):
+    """Pesquisa local (trocas entre campos) até não melhorar ou state.swaps chegar a max_swaps"""
+    rng.shuffle(playing)
+    courts = [playing[c * 4:c * 4 + 4] for c in range(num_courts)]
+    costs = [state.court_cost(c) for c in courts]
+
+    if num_courts < 2:
+        return courts
+
+    stale = 0
+    max_stale = 200 * num_courts
+    while stale < max_stale and sum(costs) > 0 and state.swaps < max_swaps:
+        state.swaps += 1
+        ci, cj = rng.sample(range(num_courts), 2)
+        pi, pj = rng.randrange(4), rng.randrange(4)
+        court_i, court_j = courts[ci], courts[cj]
+
+        court_i[pi], court_j[pj] = court_j[pj], court_i[pi]
+        new_i, new_j = state.court_cost(court_i), state.court_cost(court_j)
+
+        if new_i + new_j < costs[ci] + costs[cj]:
+            costs[ci], costs[cj] = new_i, new_j
+            stale = 0
+        else:
+            court_i[pi], court_j[pj] = court_j[pj], court_i[pi]
+            stale += 1
+
+    return courts
+
+
+def mixer(player_ids: list[str], num_courts: int, day: date, num_rounds: int = DEFAULT_ROUNDS,
+          partners: dict = None, opponents: dict = None, levels: dict = None,
+          max_swaps: int = MAX_SWAPS, seed=None,
+          start_time: time = START_TIME, round_duration: timedelta = ROUND_DURATION):
+    """Gerador Americano/Mexicano para qualquer número de jogadores (mínimo 4).
+
+    Em cada ronda jogam min(num_courts, n // 4) campos; os restantes jogadores
+    folgam (primeiro os que jogaram mais). Os grupos de cada campo são escolhidos
+    por pesquisa local para minimizar parcerias e confrontos repetidos
+    (incluindo o histórico partners/opponents) e equilibrar os níveis das
+    equipas. max_swaps limita o número total de trocas tentadas (e não o
+    tempo), por isso a mesma semente e histórico dão sempre o mesmo resultado.
+    """
+    if len(player_ids) < 4:
+        raise ValueError("São necessários pelo menos 4 jogadores")
+
+    rng = random.Random(seed)
+    state = _MixerState(player_ids, partners, opponents, levels)
+    courts_per_round = min(num_courts, len(player_ids) // 4)
+    start = datetime.combine(day, start_time)
+
+    matches = []
+    for round_number in range(1, num_rounds + 1):
+        # Folgas: jogam primeiro os que têm menos jogos (desempate aleatório)
+        order = sorted(range(len(player_ids)), key=lambda i: (state.games[i], rng.random()))
+        playing = order[:courts_per_round * 4]
+
+        courts = _search_round(state, playing, courts_per_round, rng, max_swaps * round_number // num_rounds)
+
+        for court_index, court in enumerate(courts):
+            team_a, team_b = state.best_split(court)
+            state.record(team_a, team_b)
+
+            matches.append(ScheduledMatch(
+                order=round_number,
+                court=court_index + 1,
+                scheduled_at=start + (round_number - 1) * round_duration,
+                team_a_ids=[player_ids[i] for i in team_a],
+                team_b_ids=[player_ids[i] for i in team_b],
+            ))
+
+    return matches
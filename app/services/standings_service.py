@@ -0,0 +1,137 @@
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.orm import Session
+from app.models.standing import CompetitionStanding
+from app.models.match import Match, MatchPlayer
+from app.models.game_day import GameDay
+from app.models.player import Player
+from app.services.ranking_service import COLUMNS, standing_row
+
+
+def _add(deltas: dict, player_ids, pts_for: int, pts_against: int, sign: int):
+    for pid in player_ids:
+        d = deltas.setdefault(pid, [0] * len(COLUMNS))
+        d[0] += sign
+        d[1] += sign * (pts_for > pts_against)
+        d[2] += sign * (pts_for == pts_against)
+        d[3] += sign * (pts_for < pts_against)
+        d[4] += sign * pts_for
+        d[5] += sign * pts_against
+
+
+def match_delta(deltas: dict, match: Match, old=None, new=None):
+    """Acumula em deltas a diferença entre o resultado antigo e o novo de um jogo.
+
+    old/new são tuplos (pontos A, pontos B); None quando o jogo é criado/eliminado.
+    """
+    team_a, team_b = match.team_a_ids, match.team_b_ids
+
+    if old is not None:
+        _add(deltas, team_a, old[0], old[1], -1)
+        _add(deltas, team_b, old[1], old[0], -1)
+    if new is not None:
+        _add(deltas, team_a, new[0], new[1], 1)
+        _add(deltas, team_b, new[1], new[0], 1)
+
+
+def apply_deltas(db: Session, competition_id: str, deltas: dict):
+    """Aplica os deltas à tabela de classificação (sem commit) e remove as linhas
+    que ficaram sem jogos (p.ex. depois de eliminar os jogos de um dia)"""
+    deltas = {pid: d for pid, d in deltas.items() if any(d)}
+    if not deltas:
+        return
+
+    rows = {
+        s.player_id: s
+        for s in db.query(CompetitionStanding).filter(
+            CompetitionStanding.competition_id == competition_id,
+            CompetitionStanding.player_id.in_(deltas.keys())
+        )
+    }
+
+    for pid, d in deltas.items():
+        row = rows.get(pid)
+        if row is None:
+            db.add(CompetitionStanding(
+                competition_id=competition_id,
+                player_id=pid,
+                **dict(zip(COLUMNS, d))
+            ))
+            continue
+
+        # UPDATE ... SET col = col + delta (atómico na base de dados)
+        for col, value in zip(COLUMNS, d):
+            if value:
+                setattr(row, col, getattr(CompetitionStanding, col) + value)
+
+    if any(d[0] < 0 for d in deltas.values()):
+        db.flush()
+        db.execute(delete(CompetitionStanding).where(
+            CompetitionStanding.competition_id == competition_id,
+            CompetitionStanding.player_id.in_(deltas.keys()),
+            CompetitionStanding.games <= 0,
+        ))
+
+
+def get_competition_id(db: Session, game_day_id: str):
+    return db.query(GameDay.competition_id).filter(GameDay.id == game_day_id).scalar()
+
+
+def get_ranking(db: Session, competition_id: str):
+    """Classificação da competição lida diretamente da tabela de standings"""
+    s = CompetitionStanding
+    win_rate = case((s.games > 0, s.wins * 100.0 / s.games), else_=0)
+
+    rows = (
+        db.query(Player.name, s)
+        .join(Player, Player.id == s.player_id)
+        .filter(s.competition_id == competition_id, s.games > 0)
+        .order_by(s.points_for.desc(), win_rate.desc())
+        .all()
+    )
+
+    return [
+        standing_row(
+            name=name,
+            player_id=standing.player_id,
+            **{col: getattr(standing, col) for col in COLUMNS}
+        )
+        for name, standing in rows
+    ]
+
+
+def rebuild(db: Session, competition_id: str = None):
+    """Recalcula a classificação a partir dos jogos (repara desvios). Sem commit."""
+    pts_for = case((MatchPlayer.team == "A", Match.points_team_a), else_=Match.points_team_b)
+    pts_against = case((MatchPlayer.team == "A", Match.points_team_b), else_=Match.points_team_a)
+
+    query = (
+        select(
+            GameDay.competition_id,
+            MatchPlayer.player_id,
+            func.count(),
+            func.sum(case((pts_for > pts_against, 1), else_=0)),
+            func.sum(case((pts_for == pts_against, 1), else_=0)),
+            func.sum(case((pts_for < pts_against, 1), else_=0)),
+            func.sum(pts_for),
+            func.sum(pts_against),
+        )
+        .join(Match, Match.id == MatchPlayer.match_id)
+        .join(GameDay, GameDay.id == Match.game_day_id)
+        .group_by(GameDay.competition_id, MatchPlayer.player_id)
+    )
+
+    delete = db.query(CompetitionStanding)
+    if competition_id:
+        query = query.where(GameDay.competition_id == competition_id)
+        delete = delete.filter(CompetitionStanding.competition_id == competition_id)
+
+    delete.delete(synchronize_session=False)
+
+    values = [
+        {"competition_id": row[0], "player_id": row[1], **dict(zip(COLUMNS, row[2:]))}
+        for row in db.execute(query)
+    ]
+    if values:
+        db.execute(CompetitionStanding.__table__.insert(), values)
+
+    return len(values)
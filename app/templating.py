@@ -0,0 +1,21 @@
+"""Ambiente Jinja2 partilhado por todas as rotas HTML.
+
+Os templates compilados ficam numa cache de bytecode em disco (TEMPLATE_CACHE_DIR,
+por omissão na pasta temporária do sistema), partilhada pelos workers e pelos
+arranques seguintes: um worker novo não volta a compilar os templates.
+"""
+import os
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+TEMPLATES_DIR = "app/templates"
+TEMPLATE_CACHE_DIR = os.environ.get("TEMPLATE_CACHE_DIR")
+
+if TEMPLATE_CACHE_DIR:
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+
+templates = Jinja2Templates(env=Environment(
+    loader=FileSystemLoader(TEMPLATES_DIR),
+    autoescape=True,
+    bytecode_cache=FileSystemBytecodeCache(TEMPLATE_CACHE_DIR),
+))
@@ -0,0 +1,106 @@
+"""Teste de carga das rotas de leitura em modo síncrono (Session na threadpool)
+vs. assíncrono (AsyncSession, DB_ASYNC=1) sobre o mesmo ficheiro SQLite.
+
+    python -m benchmarks.async_load [--requests 600] [--concurrency 50] [--game-days 10]
+
+Requer aiosqlite.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+from time import perf_counter
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.concurrency import run_in_threadpool
+
+from app.database import get_read_db
+from app.models.game_day import GameDay
+from app.routers import competition_router, game_day_router, match_router
+from benchmarks.common import make_engine, make_sessionmaker, seed_competition
+
+
+def build_app(read_db):
+    app = FastAPI()
+    app.include_router(competition_router.router)
+    app.include_router(game_day_router.router)
+    app.include_router(match_router.router)
+    app.dependency_overrides[get_read_db] = read_db
+    return app
+
+
+async def drive(app, urls, total, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with semaphore:
+                start = perf_counter()
+                response = await client.get(urls[i % len(urls)])
+                latencies.append(perf_counter() - start)
+                response.raise_for_status()
+
+        start = perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--game-days", type=int, default=10)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = make_engine(f"sqlite:///{path}")
+    Session = make_sessionmaker(engine)
+
+    db = Session()
+    competition_id = seed_competition(db, num_game_days=args.game_days).id
+    game_day_id = db.query(GameDay.id).filter(GameDay.competition_id == competition_id).first()[0]
+    db.close()
+
+    urls = [
+        f"/competitions/{competition_id}/ranking",
+        f"/game-days/{game_day_id}/ranking",
+        f"/matches/{game_day_id}/matches",
+    ]
+
+    async def sync_read_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            await run_in_threadpool(session.close)
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def async_read_db():
+        async with AsyncSession() as session:
+            yield session
+
+    print(f"{args.requests} pedidos, concorrência {args.concurrency}")
+    print(f"{'modo':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for mode, read_db in (("sync", sync_read_db), ("async", async_read_db)):
+        result = asyncio.run(drive(build_app(read_db), urls, args.requests, args.concurrency))
+        print(f"{mode:<6} {result['rps']:>8.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f}")
+
+    asyncio.run(async_engine.dispose())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark do arranque a frio de um worker: cada execução é um interpretador novo.
+
+    python -m benchmarks.cold_start [--runs 10]
+
+Mede, por processo: o import de app.main, o arranque (lifespan: criação do
+engine) e o primeiro pedido a cada página HTML (compilação dos templates).
+Os templates são medidos com a cache de bytecode vazia (primeiro worker depois
+de um deploy) e já preenchida (workers seguintes).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+from benchmarks.common import make_engine, make_sessionmaker, seed_tournament
+
+CHILD = """
+import json, sys
+from time import perf_counter
+t0 = perf_counter()
+from app.main import app
+t1 = perf_counter()
+from fastapi.testclient import TestClient
+t2 = perf_counter()
+with TestClient(app) as client:
+    t3 = perf_counter()
+    for path in sys.argv[1:]:
+        assert client.get(path).status_code == 200, path
+    t4 = perf_counter()
+print(json.dumps({"import": t1 - t0, "startup": t3 - t2, "first_requests": t4 - t3}))
+"""
+
+
+def run_worker(env: dict, paths) -> dict:
+    start = perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, *paths],
+        env=env, capture_output=True, text=True, check=True
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = perf_counter() - start
+    return timings
+
+
+def summarize(samples) -> dict:
+    return {
+        key: round(statistics.median(s[key] for s in samples) * 1000, 1)
+        for key in ("process", "import", "startup", "first_requests")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = make_engine(url)
+        db = make_sessionmaker(engine)()
+        data = seed_tournament(db, num_players=40, num_competitions=2, game_days=4)
+        db.close()
+        engine.dispose()
+
+        competition, day = data["competitions"][0], data["game_days"][0]
+        paths = [
+            "/", "/competitions/", f"/competitions/{competition}/ranking",
+            f"/game-days/competition/{competition}", f"/game-days/{day}/ranking",
+            f"/matches/{day}/matches", "/players/",
+        ]
+        env = {**os.environ, "DATABASE_URL": url}
+
+        results = {}
+        cold = []
+        for i in range(args.runs):
+            cache_dir = os.path.join(tmp, f"templates-{i}")
+            cold.append(run_worker({**env, "TEMPLATE_CACHE_DIR": cache_dir}, paths))
+        results["templates_cold"] = summarize(cold)
+
+        warm_dir = os.path.join(tmp, "templates-warm")
+        run_worker({**env, "TEMPLATE_CACHE_DIR": warm_dir}, paths)
+        warm = [
+            run_worker({**env, "TEMPLATE_CACHE_DIR": warm_dir}, paths)
+            for _ in range(args.runs)
+        ]
+        results["templates_warm"] = summarize(warm)
+
+    print(f"Mediana de {args.runs} processos (ms):")
+    print(f"  {'':<16}{'processo':>10}{'import':>10}{'arranque':>10}{'1ºs pedidos':>13}")
+    for name, r in results.items():
+        print(f"  {name:<16}{r['process']:>10}{r['import']:>10}{r['startup']:>10}{r['first_requests']:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Utilitários partilhados pelos benchmarks: base de dados SQLite isolada,
+contador de queries e geração de dados sintéticos.
+
+Correr sempre a partir da raiz do projeto, p.ex. ``python -m benchmarks.query_counts``.
+"""
+import random
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.migrations import run_migrations
+from app.models.competition import Competition
+from app.models.game_day import GameDay, game_day_players
+from app.models.player import Player
+from app.services.match_service import insert_matches
+from app.services.schedule_service import ScheduledMatch, round_robin
+
+
+def make_engine(url: str = "sqlite://"):
+    """Engine SQLite (por omissão em memória) com o esquema já criado"""
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool if url == "sqlite://" else None,
+    )
+    run_migrations(engine)
+    return engine
+
+
+def make_sessionmaker(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class QueryCounter:
+    """Conta as instruções SQL executadas num engine enquanto ativo"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def seed_competition(db, num_game_days: int, num_courts: int = 4, rounds: int = 7,
+                     num_players: int = 40, seed: int = 0):
+    """Cria uma competição com jogadores, dias de jogo e jogos com resultados aleatórios"""
+    rng = random.Random(seed)
+
+    players = [
+        Player(
+            id=str(uuid.uuid4()),
+            name=f"Jogador {i:05d}",
+            sexo=rng.choice("MF"),
+            nivel=rng.choice(["M1", "M2", "M3", "F1", "F2", "F3"]),
+            data_nascimento=date(1970, 1, 1) + timedelta(days=rng.randint(0, 15000)),
+        )
+        for i in range(num_players)
+    ]
+    db.add_all(players)
+
+    competition = Competition(
+        id=str(uuid.uuid4()),
+        name=f"Liga {seed}",
+        start_date=date(2025, 1, 1),
+        end_date=date(2025, 12, 31),
+    )
+    db.add(competition)
+
+    for d in range(num_game_days):
+        day = GameDay(
+            id=str(uuid.uuid4()),
+            competition_id=competition.id,
+            date=competition.start_date + timedelta(days=7 * d),
+            num_courts=num_courts,
+        )
+        day.players = rng.sample(players, min(num_courts * 4, num_players))
+        db.add(day)
+
+        matches = []
+        for order in range(1, rounds + 1):
+            shuffled = rng.sample(day.players, len(day.players))
+            for court in range(num_courts):
+                p1, p2, p3, p4 = shuffled[court * 4:court * 4 + 4]
+                matches.append(ScheduledMatch(
+                    order=order,
+                    court=court + 1,
+                    scheduled_at=datetime.combine(day.date, datetime.min.time()),
+                    team_a_ids=[p1.id, p2.id],
+                    team_b_ids=[p3.id, p4.id],
+                    points_team_a=rng.randint(0, 7),
+                    points_team_b=rng.randint(0, 7),
+                ))
+        db.flush()
+        insert_matches(db, day.id, competition.id, matches)
+
+    db.commit()
+    return competition
+
+
+def seed_tournament(db, num_players: int, num_competitions: int, game_days: int,
+                    num_courts: int = 2, seed: int = 0):
+    """Gera um clube completo de forma reprodutível (mesmo seed -> mesmos dados):
+    jogadores, competições, dias de jogo com inscritos em game_day_players e
+    jogos round-robin (a mesma lógica de generate_matches) com resultados aleatórios.
+
+    Devolve um resumo com as contagens e os ids úteis para os benchmarks.
+    """
+    rng = random.Random(seed)
+    new_id = lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    players = [
+        {
+            "id": new_id(),
+            "name": f"Jogador {i:05d}",
+            "sexo": rng.choice("MF"),
+            "nivel": rng.choice(["M1", "M2", "M3", "F1", "F2", "F3"]),
+            "data_nascimento": date(1970, 1, 1) + timedelta(days=rng.randint(0, 15000)),
+        }
+        for i in range(num_players)
+    ]
+    db.execute(insert(Player), players)
+    player_ids = [p["id"] for p in players]
+
+    per_day = num_courts * 4
+    competitions, days, num_matches = [], [], 0
+    for c in range(num_competitions):
+        competition_id = new_id()
+        start = date(2020, 1, 1) + timedelta(days=365 * c)
+        db.execute(insert(Competition), [{
+            "id": competition_id,
+            "name": f"Liga {seed}-{c:03d}",
+            "start_date": start,
+            "end_date": start + timedelta(days=364),
+            "status": "Em curso",
+        }])
+        competitions.append(competition_id)
+
+        for d in range(game_days):
+            day_id = new_id()
+            day_date = start + timedelta(days=7 * d)
+            enrolled = rng.sample(player_ids, min(per_day, num_players))
+            db.execute(insert(GameDay), [{
+                "id": day_id,
+                "competition_id": competition_id,
+                "date": day_date,
+                "num_courts": num_courts,
+            }])
+            db.execute(game_day_players.insert(), [
+                {"game_day_id": day_id, "player_id": pid} for pid in enrolled
+            ])
+            days.append(day_id)
+
+            matches = round_robin(enrolled, num_courts, day_date)
+            for m in matches:
+                m.id = new_id()
+                m.points_team_a = rng.randint(0, 7)
+                m.points_team_b = rng.randint(0, 7)
+            insert_matches(db, day_id, competition_id, matches)
+            # autoflush desligado: a classificação pendente tem de ir antes do próximo dia
+            db.flush()
+            num_matches += len(matches)
+
+    db.commit()
+    return {
+        "players": player_ids,
+        "competitions": competitions,
+        "game_days": days,
+        "counts": {
+            "players": num_players,
+            "competitions": num_competitions,
+            "game_days": len(days),
+            "matches": num_matches,
+        },
+    }
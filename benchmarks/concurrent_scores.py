@@ -0,0 +1,203 @@
+"""Teste de concorrência de "Guardar Resultados" (/matches/save-all/{dia}):
+vários marcadores submetem ao mesmo tempo o formulário completo do mesmo dia.
+
+    python -m benchmarks.concurrent_scores [--clients 8] [--url postgresql://...]
+
+Cenários (os dois primeiros com os pedidos disparados em paralelo):
+  campos diferentes    cada cliente altera só o seu jogo; todos os jogos têm de
+                       ficar com o valor do seu cliente (nenhuma gravação perdida)
+  mesmo jogo           todos alteram o mesmo jogo; só um pode ganhar e os outros
+                       recebem 409 com o conflito
+  formulário antigo    cada cliente grava, um depois do outro, o formulário que
+                       todos abriram ao mesmo tempo, com só o seu jogo alterado:
+                       todos são gravados (303) sem repor o valor antigo dos jogos
+                       dos anteriores; por fim um cliente altera, no mesmo
+                       formulário antigo, um jogo já gravado: 409 só com esse jogo
+No fim, a classificação, as estatísticas de pares e os ratings mantidos
+incrementalmente têm de coincidir com uma reconstrução completa. Falha com
+código de saída 1.
+
+Por omissão usa um ficheiro SQLite temporário; com --url uma base já migrada.
+SQLite serializa as escritas: os cenários paralelos (p.ex. dois replays de
+ratings ao mesmo tempo) só são postos à prova em PostgreSQL.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+import httpx
+from sqlalchemy import create_engine
+
+from app.models.game_day import GameDay
+from app.models.match import Match
+from app.models.pair_stat import PairStat
+from app.models.rating import PlayerRating
+from app.models.standing import CompetitionStanding
+from app.services import pair_service, rating_service, standings_service
+from benchmarks.common import make_engine, make_sessionmaker, seed_competition
+from benchmarks.routes import build_app
+
+
+def read_form(Session, game_day_id: str) -> dict:
+    """{match_id: (pontos A, pontos B, versão)}, como no formulário da página"""
+    db = Session()
+    try:
+        return {
+            mid: (a, b, version)
+            for mid, a, b, version in db.query(
+                Match.id, Match.points_team_a, Match.points_team_b, Match.version
+            ).filter(Match.game_day_id == game_day_id)
+        }
+    finally:
+        db.close()
+
+
+def form_data(form: dict, changes: dict) -> dict:
+    """O formulário completo, como o browser o envia, com os jogos de changes alterados"""
+    data = {}
+    for mid, (a, b, version) in form.items():
+        data[f"original_{mid}"] = f"{a}-{b}"
+        a, b = changes.get(mid, (a, b))
+        data.update({
+            f"points_team_a_{mid}": a, f"points_team_b_{mid}": b, f"version_{mid}": version
+        })
+    return data
+
+
+async def submit_all(app, game_day_id: str, submissions) -> list[int]:
+    """Dispara todas as submissões em paralelo; devolve os códigos HTTP"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        responses = await asyncio.gather(*(
+            client.post(f"/matches/save-all/{game_day_id}", data=data)
+            for data in submissions
+        ))
+    return [r.status_code for r in responses]
+
+
+def snapshot(db, model, competition_id: str) -> set:
+    columns = [c.name for c in model.__table__.columns]
+    return {
+        tuple(getattr(row, c) for c in columns)
+        for row in db.query(model).filter(model.competition_id == competition_id)
+    }
+
+
+def ratings(db) -> set:
+    return {
+        (pid, gid, round(rating, 6), round(rd, 6), games)
+        for pid, gid, rating, rd, games in db.query(
+            PlayerRating.player_id, PlayerRating.game_day_id,
+            PlayerRating.rating, PlayerRating.rd, PlayerRating.games
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--url", help="base de dados existente (por omissão SQLite temporária)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            engine = create_engine(args.url)
+        else:
+            engine = make_engine(f"sqlite:///{os.path.join(tmp, 'concurrency.db')}")
+        Session = make_sessionmaker(engine)
+
+        db = Session()
+        competition_id = seed_competition(db, num_game_days=2).id
+        game_day_id = db.query(GameDay.id).filter(GameDay.competition_id == competition_id).first()[0]
+        db.close()
+
+        app = build_app(Session)
+        failures = []
+
+        # campos diferentes: cada cliente altera um jogo, todos com o mesmo formulário
+        form = read_form(Session, game_day_id)
+        mids = sorted(form)[:args.clients]
+        wanted = {mid: ((form[mid][0] + 1) % 8, (form[mid][1] + 2) % 8) for mid in mids}
+        statuses = asyncio.run(submit_all(
+            app, game_day_id, [form_data(form, {mid: wanted[mid]}) for mid in mids]
+        ))
+        final = read_form(Session, game_day_id)
+        lost = [mid for mid in mids if final[mid][:2] != wanted[mid]]
+        print(f"campos diferentes: {len(mids)} pedidos -> {statuses.count(303)} x 303, "
+              f"{statuses.count(409)} x 409; gravações perdidas: {len(lost)}")
+        if lost or set(statuses) - {303, 409}:
+            failures.append("campos diferentes")
+
+        # mesmo jogo: só um pode ganhar
+        form = final
+        mid = mids[0]
+        values = [(i % 8, (i + 3) % 8) for i in range(args.clients)]
+        values = [v for v in values if v != form[mid][:2]]
+        statuses = asyncio.run(submit_all(
+            app, game_day_id, [form_data(form, {mid: v}) for v in values]
+        ))
+        final = read_form(Session, game_day_id)
+        winners = [v for v, status in zip(values, statuses) if status == 303]
+        print(f"mesmo jogo: {len(values)} pedidos -> {statuses.count(303)} x 303, "
+              f"{statuses.count(409)} x 409; valor final {final[mid][:2]}, versão {final[mid][2]}")
+        if winners != [final[mid][:2]] or statuses.count(409) != len(values) - 1:
+            failures.append("mesmo jogo")
+
+        # formulário antigo: o caso em que a última gravação apagava as anteriores
+        form = final
+        mids = sorted(form)[:args.clients]
+        wanted = {mid: ((form[mid][0] + 3) % 8, (form[mid][1] + 1) % 8) for mid in mids}
+        statuses = []
+        for mid in mids:
+            statuses += asyncio.run(submit_all(app, game_day_id, [form_data(form, {mid: wanted[mid]})]))
+        final = read_form(Session, game_day_id)
+        lost = [mid for mid in mids if final[mid][:2] != wanted[mid]]
+        # o mesmo formulário antigo, agora a alterar um jogo que outro cliente já gravou
+        stale = ((form[mids[0]][0] + 5) % 8, (form[mids[0]][1] + 5) % 8)
+        transport = httpx.ASGITransport(app=app)
+
+        async def conflict():
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.post(f"/matches/save-all/{game_day_id}",
+                                         data=form_data(form, {mids[0]: stale}))
+
+        response = asyncio.run(conflict())
+        final = read_form(Session, game_day_id)
+        overwritten = final[mids[0]][:2] != wanted[mids[0]]
+        reported = response.text.count("scoreboard-row conflict")
+        print(f"formulário antigo: {len(mids)} pedidos -> {statuses.count(303)} x 303, "
+              f"{statuses.count(409)} x 409; gravações perdidas: {len(lost)}; "
+              f"jogo já gravado -> {response.status_code}, {reported} jogo(s) em conflito")
+        if lost or statuses != [303] * len(mids) or overwritten \
+                or response.status_code != 409 or reported != 1:
+            failures.append("formulário antigo")
+
+        # os deltas aplicados em paralelo têm de dar o mesmo que uma reconstrução
+        db = Session()
+        incremental = [snapshot(db, m, competition_id) for m in (CompetitionStanding, PairStat)]
+        incremental.append(ratings(db))
+        standings_service.rebuild(db, competition_id)
+        pair_service.rebuild(db, competition_id)
+        rating_service.rebuild(db)
+        db.flush()
+        rebuilt = [snapshot(db, m, competition_id) for m in (CompetitionStanding, PairStat)]
+        rebuilt.append(ratings(db))
+        db.rollback()
+        db.close()
+        consistent = incremental == rebuilt
+        print(f"classificação, pares e ratings == reconstrução: {consistent}")
+        if not consistent:
+            failures.append("classificação")
+
+        engine.dispose()
+
+    if failures:
+        print(f"\nFalhou: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nSem gravações perdidas nem conflitos por detetar")
+
+
+if __name__ == "__main__":
+    main()
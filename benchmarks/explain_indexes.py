@@ -0,0 +1,134 @@
+"""Verifica com EXPLAIN que as queries mais frequentes usam os índices declarados.
+
+    python -m benchmarks.explain_indexes [--url postgresql://...]
+
+Captura as instruções SQL realmente executadas por match_service.get_by_game_day,
+pela listagem de dias de jogo (/game-days/competition/{id}), pelos top-K de
+pares (pair_service) e pelo histórico de um jogador (/players/{id}) e corre
+EXPLAIN sobre cada uma. Falha (código de saída 1) se alguma ler por varrimento
+completo da tabela uma das tabelas em TABLES.
+
+Por omissão usa uma base SQLite temporária com dados gerados; com --url corre
+sobre uma base existente já migrada (em PostgreSQL, com enable_seqscan=off,
+para que tabelas pequenas não escondam a falta de um índice).
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+from sqlalchemy import create_engine, event
+
+from app.models.competition import Competition
+from app.models.game_day import GameDay
+from app.models.pair_stat import OPPONENT, PARTNER, PairStat
+from app.routers.game_day_router import _game_days_context
+from app.services import pair_service, player_service
+from app.services.match_service import get_by_game_day
+from benchmarks.common import make_engine, make_sessionmaker, seed_tournament
+
+TABLES = ("matches", "match_players", "game_days", "game_day_players", "pair_stats", "player_ratings")
+
+# Varrimento completo de uma das tabelas, no formato de cada base de dados
+FULL_SCAN = {
+    "sqlite": re.compile(rf"\bSCAN ({'|'.join(TABLES)})(_\d+)?\b(?! USING (COVERING )?INDEX \w+ \()"),
+    "postgresql": re.compile(rf"Seq Scan on ({'|'.join(TABLES)})\b"),
+}
+
+
+def capture(engine, fn):
+    """(SQL, parâmetros) de cada instrução executada por fn()"""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+    return statements
+
+
+def explain(engine, statement, parameters) -> list[str]:
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [row[-1] for row in rows]
+
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        plan = [row[0] for row in rows]
+        conn.rollback()
+        return plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="base de dados existente (por omissão SQLite temporária)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            engine = create_engine(args.url)
+        else:
+            engine = make_engine(f"sqlite:///{os.path.join(tmp, 'explain.db')}")
+            db = make_sessionmaker(engine)()
+            seed_tournament(db, num_players=40, num_competitions=2, game_days=6)
+            db.close()
+
+        db = make_sessionmaker(engine)()
+        competition_id = db.query(Competition.id).limit(1).scalar()
+        game_day_id = db.query(GameDay.id).filter(
+            GameDay.competition_id == competition_id
+        ).limit(1).scalar()
+        if game_day_id is None:
+            sys.exit("A base de dados não tem dias de jogo")
+        player_id = db.query(PairStat.player_id).filter(
+            PairStat.competition_id == competition_id
+        ).limit(1).scalar()
+
+        checks = {
+            "match_service.get_by_game_day": lambda: get_by_game_day(db, game_day_id),
+            "list_game_days": lambda: _game_days_context(db, competition_id),
+            "pair_service.get_top": lambda: [
+                pair_service.get_top(db, competition_id, relation, 10)
+                for relation in (PARTNER, OPPONENT)
+            ],
+            "pair_service.get_player_pairs": lambda: [
+                pair_service.get_player_pairs(db, player_id, PARTNER, 10),
+                pair_service.get_player_pairs(db, player_id, OPPONENT, 10, competition_id),
+            ],
+            "player_service.get_history": lambda: player_service.get_history(
+                db, player_id, player_service.get_history(db, player_id, limit=5)[1], limit=5
+            ),
+        }
+        pattern = FULL_SCAN[engine.dialect.name]
+
+        failures = 0
+        for name, fn in checks.items():
+            print(f"== {name}")
+            db.expunge_all()
+            for statement, parameters in capture(engine, fn):
+                if not re.search(rf"\b({'|'.join(TABLES)})\b", statement):
+                    continue
+                plan = explain(engine, statement, parameters)
+                bad = any(pattern.search(line) for line in plan)
+                failures += bad
+                print(f"  {'❌' if bad else '✅'} {' '.join(statement.split())[:110]}")
+                for line in plan:
+                    print(f"       {line}")
+
+        db.close()
+        engine.dispose()
+
+    if failures:
+        print(f"\n{failures} querie(s) com varrimento completo")
+        sys.exit(1)
+    print("\nTodas as queries usam índices")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Verifica a atualização de uma base de dados da versão inicial (sem
+schema_migrations, equipas em colunas CSV) com as migrações atuais.
+
+    python -m benchmarks.migrate_upgrade
+
+Cria uma base SQLite com o esquema antigo e alguns jogos, corre run_migrations
+e confirma que as tabelas derivadas dos jogos ficaram preenchidas e iguais a uma
+reconstrução completa, e que a chave cronológica copiada para match_players foi
+preenchida. Termina com código 1 se alguma falhar.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import uuid
+
+from sqlalchemy import create_engine, func, select
+
+from app.migrations import run_migrations
+from app.models.match import MatchPlayer
+from app.models.pair_stat import PairStat
+from app.models.rating import PlayerRating
+from app.models.standing import CompetitionStanding
+from app.services import pair_service, rating_service, standings_service
+from benchmarks.common import make_sessionmaker
+
+LEGACY_SCHEMA = """
+CREATE TABLE competitions (id VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, start_date DATE NOT NULL,
+    end_date DATE NOT NULL, status VARCHAR NOT NULL);
+CREATE TABLE players (id VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, sexo VARCHAR, nivel VARCHAR,
+    data_nascimento DATE NOT NULL);
+CREATE TABLE game_days (id VARCHAR PRIMARY KEY, competition_id VARCHAR REFERENCES competitions(id),
+    date DATE NOT NULL, num_courts INTEGER NOT NULL, groups VARCHAR, group_name VARCHAR);
+CREATE TABLE game_day_players (game_day_id VARCHAR REFERENCES game_days(id),
+    player_id VARCHAR REFERENCES players(id));
+CREATE TABLE matches (id VARCHAR PRIMARY KEY, game_day_id VARCHAR REFERENCES game_days(id),
+    "order" INTEGER NOT NULL, scheduled_at DATETIME NOT NULL, court INTEGER NOT NULL,
+    team_a_players VARCHAR NOT NULL, team_b_players VARCHAR NOT NULL,
+    points_team_a INTEGER NOT NULL, points_team_b INTEGER NOT NULL);
+"""
+
+
+def seed_legacy(path: str, num_days: int = 3, seed: int = 0):
+    """Base no esquema antigo: uma competição, 8 jogadores, 2 campos x 7 rondas por dia"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.execute("INSERT INTO competitions VALUES ('c1', 'Liga', '2026-01-01', '2026-12-31', 'Em curso')")
+    players = [f"p{i}" for i in range(8)]
+    for i, pid in enumerate(players):
+        conn.execute("INSERT INTO players VALUES (?, ?, 'M', 'M2', '1990-01-01')", (pid, f"Jogador {i}"))
+
+    for d in range(num_days):
+        day_id, day = f"g{d}", f"2026-03-{d + 1:02d}"
+        conn.execute("INSERT INTO game_days VALUES (?, 'c1', ?, 2, NULL, 'A')", (day_id, day))
+        conn.executemany("INSERT INTO game_day_players VALUES (?, ?)", [(day_id, p) for p in players])
+        for order in range(1, 8):
+            for court in (1, 2):
+                a1, a2, b1, b2 = rng.sample(players, 4)
+                conn.execute(
+                    "INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (str(uuid.UUID(int=rng.getrandbits(128))), day_id, order, f"{day} 10:00:00", court,
+                     f"{a1},{a2}", f"{b1},{b2}", rng.randint(0, 7), rng.randint(0, 7)),
+                )
+    conn.commit()
+    conn.close()
+
+
+def snapshot(db, model) -> list:
+    return sorted(
+        tuple(round(v, 6) if isinstance(v, float) else v for v in row)
+        for row in db.execute(select(*model.__table__.columns)).all()
+    )
+
+
+# (tabela, modelo, reconstrução completa)
+DERIVED = [
+    ("competition_standings", CompetitionStanding, standings_service.rebuild),
+    ("player_ratings", PlayerRating, rating_service.rebuild),
+    ("pair_stats", PairStat, pair_service.rebuild),
+]
+
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "legacy.db")
+        seed_legacy(path)
+        engine = create_engine(f"sqlite:///{path}")
+        applied = run_migrations(engine)
+        print(f"Migrações aplicadas: {[version for version, _, _ in applied]}")
+
+        db = make_sessionmaker(engine)()
+        for name, model, rebuild in DERIVED:
+            rows = db.execute(select(func.count()).select_from(model)).scalar()
+            migrated = snapshot(db, model)
+            rebuild(db)
+            ok = rows > 0 and migrated == snapshot(db, model)
+            db.rollback()
+            failures += not ok
+            print(f"  {'✅' if ok else '❌'} {name}: {rows} linhas")
+
+        missing = db.execute(
+            select(func.count()).where(MatchPlayer.date.is_(None) | MatchPlayer.court.is_(None))
+        ).scalar()
+        failures += missing > 0
+        print(f"  {'✅' if not missing else '❌'} match_players sem chave cronológica: {missing}")
+        db.close()
+        engine.dispose()
+
+    if failures:
+        print(f"\n{failures} tabela(s) vazias ou diferentes da reconstrução completa")
+        sys.exit(1)
+    print("\nTabelas derivadas iguais à reconstrução completa")
+
+
+if __name__ == "__main__":
+    main()
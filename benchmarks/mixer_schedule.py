@@ -0,0 +1,78 @@
+"""Qualidade vs. tempo do gerador mixer (schedule_service.mixer).
+
+Simula uma competição de vários dias de jogo, acumulando o histórico de
+parcerias/confrontos entre dias, para vários orçamentos de trocas (max_swaps).
+
+    python -m benchmarks.mixer_schedule [--days 6] [--budgets 0 1000 10000 50000 200000]
+"""
+import argparse
+import random
+from datetime import date, timedelta
+from time import perf_counter
+
+from app.services.schedule_service import mixer
+
+SCENARIOS = [  # (jogadores, campos)
+    (16, 4),
+    (30, 7),   # com folgas
+    (64, 16),
+]
+
+
+def pair(a, b):
+    return (a, b) if a < b else (b, a)
+
+
+def simulate(num_players, num_courts, days, budget, seed=0):
+    rng = random.Random(seed)
+    ids = [f"p{i:03d}" for i in range(num_players)]
+    levels = {pid: rng.randint(1, 5) for pid in ids}
+    partners, opponents = {}, {}
+    elapsed = []
+    level_diff = []
+
+    for d in range(days):
+        start = perf_counter()
+        matches = mixer(
+            ids, num_courts, date(2025, 1, 1) + timedelta(days=7 * d),
+            partners=partners, opponents=opponents, levels=levels,
+            max_swaps=budget, seed=seed + d,
+        )
+        elapsed.append(perf_counter() - start)
+
+        for m in matches:
+            a1, a2 = m.team_a_ids
+            b1, b2 = m.team_b_ids
+            for key in (pair(a1, a2), pair(b1, b2)):
+                partners[key] = partners.get(key, 0) + 1
+            for x in (a1, a2):
+                for y in (b1, b2):
+                    key = pair(x, y)
+                    opponents[key] = opponents.get(key, 0) + 1
+            level_diff.append(abs(levels[a1] + levels[a2] - levels[b1] - levels[b2]))
+
+    return {
+        "max_day_ms": max(elapsed) * 1000,
+        "repeat_partners": sum(n - 1 for n in partners.values() if n > 1),
+        "repeat_opponents": sum(n - 1 for n in opponents.values() if n > 1),
+        "avg_level_diff": sum(level_diff) / len(level_diff),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=6)
+    parser.add_argument("--budgets", type=int, nargs="+", default=[0, 1000, 10000, 50000, 200000])
+    args = parser.parse_args()
+
+    print(f"{'jogadores':>9} {'campos':>6} {'trocas':>8} {'max ms/dia':>10} "
+          f"{'parc. rep.':>10} {'conf. rep.':>10} {'dif. nível':>10}")
+    for num_players, num_courts in SCENARIOS:
+        for budget in args.budgets:
+            r = simulate(num_players, num_courts, args.days, budget)
+            print(f"{num_players:>9} {num_courts:>6} {budget:>8} {r['max_day_ms']:>10.1f} "
+                  f"{r['repeat_partners']:>10} {r['repeat_opponents']:>10} {r['avg_level_diff']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
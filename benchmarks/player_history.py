@@ -0,0 +1,85 @@
+"""Benchmark do histórico de um jogador (/players/{id}): paginação por keyset
+vs OFFSET, da primeira à última página, sobre uma história longa em SQLite.
+
+    python -m benchmarks.player_history [--matches 100000] [--page-size 30]
+
+Usa o jogador com mais jogos. "keyset" é a página completa (get_history, com
+equipas e totais acumulados); "query" e "OFFSET" são só a query dos jogos,
+paginada pelo cursor ou com .offset(), para comparar as duas paginações.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+from time import perf_counter
+
+from sqlalchemy import func
+
+from app.models.match import MatchPlayer
+from app.services import player_service, rating_service
+from benchmarks.common import make_engine, make_sessionmaker
+from benchmarks.ratings import seed_history
+
+REPEAT = 5
+
+
+def timed(fn) -> float:
+    """Mediana (ms) de REPEAT execuções"""
+    timings = []
+    for _ in range(REPEAT):
+        start = perf_counter()
+        fn()
+        timings.append((perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=player_service.HISTORY_PAGE_SIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'history.db')}")
+        db = make_sessionmaker(engine)()
+        seed_history(db, args.matches)
+        rating_service.rebuild(db)
+        db.commit()
+
+        player_id, games = db.query(MatchPlayer.player_id, func.count()).group_by(
+            MatchPlayer.player_id
+        ).order_by(func.count().desc()).first()
+
+        # cursores de todas as páginas (e confirmação de que a paginação não perde jogos)
+        cursors, after, seen = [None], None, 0
+        while True:
+            rows, after = player_service.get_history(db, player_id, after, args.page_size)
+            seen += len(rows)
+            if not after:
+                break
+            cursors.append(after)
+        print(f"Jogador com {games} jogos: {len(cursors)} páginas de {args.page_size}"
+              f" (todos os jogos paginados: {seen == games})\n")
+
+        print(f"{'página':<10}{'keyset':>12}{'query':>12}{'OFFSET':>12}")
+        for page in sorted({1, 2, len(cursors) // 2, len(cursors)}):
+            keyset = timed(lambda: player_service.get_history(
+                db, player_id, cursors[page - 1], args.page_size
+            ))
+            query = player_service._history_query(player_id)
+            cursor = cursors[page - 1]
+            by_cursor = query.where(
+                player_service._before(player_service._parse_history_cursor(cursor))
+            ) if cursor else query
+            keyset_query = timed(lambda: db.execute(by_cursor.limit(args.page_size)).all())
+            offset = timed(lambda: db.execute(
+                query.offset((page - 1) * args.page_size).limit(args.page_size)
+            ).all())
+            print(f"{page:<10}{keyset:>9.1f} ms{keyset_query:>9.1f} ms{offset:>9.1f} ms")
+
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Verifica que as páginas listadas em PAGES executam um número fixo de
+queries, independentemente do tamanho da competição (deteção de N+1).
+
+    python -m benchmarks.query_counts
+
+Termina com código 1 se o número de queries de alguma página variar com o tamanho.
+"""
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.database import get_db, get_read_db
+from app.routers import competition_router, game_day_router
+from app.services.player_service import invalidate_roster
+from benchmarks.common import QueryCounter, make_engine, make_sessionmaker, seed_competition
+
+SIZES = [1, 5, 30]  # dias de jogo (x 7 rounds x 4 campos)
+
+PAGES = {
+    "competition_ranking": "/competitions/{competition_id}/ranking",
+    "list_game_days": "/game-days/competition/{competition_id}",
+}
+
+
+def main():
+    engine = make_engine()
+    Session = make_sessionmaker(engine)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(competition_router.router)
+    app.include_router(game_day_router.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    client = TestClient(app)
+
+    counts = {page: [] for page in PAGES}
+    for i, size in enumerate(SIZES):
+        db = Session()
+        competition_id = seed_competition(db, num_game_days=size, seed=i).id
+        db.close()
+
+        for page, url in PAGES.items():
+            invalidate_roster()
+            with QueryCounter(engine) as counter:
+                response = client.get(url.format(competition_id=competition_id))
+            response.raise_for_status()
+
+            counts[page].append(counter.count)
+            print(f"{page:<22} {size * 7 * 4:>6} jogos: {counter.count} queries")
+
+    growing = [page for page, values in counts.items() if len(set(values)) != 1]
+    if growing:
+        print(f"ERRO: o número de queries cresce com o número de jogos em {', '.join(growing)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
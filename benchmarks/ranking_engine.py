@@ -0,0 +1,102 @@
+"""Micro-benchmark do motor de classificação (ranking_service) contra o ciclo
+em dicionários que existia em cada página de ranking.
+
+    python -m benchmarks.ranking_engine [--sizes 10000 100000 1000000]
+
+Cada página constrói o MatchBatch a partir dos jogos em cada pedido, por isso a
+comparação com o ciclo antigo é feita pelo total (lote + agregação + ordenação).
+"""
+import argparse
+import random
+import time
+from collections import defaultdict
+
+from app.services.ranking_service import MatchBatch, compute_standings, rank
+
+
+class FakeMatch:
+    __slots__ = ("team_a_ids", "team_b_ids", "points_team_a", "points_team_b")
+
+    def __init__(self, team_a_ids, team_b_ids, points_team_a, points_team_b):
+        self.team_a_ids = team_a_ids
+        self.team_b_ids = team_b_ids
+        self.points_team_a = points_team_a
+        self.points_team_b = points_team_b
+
+
+def make_matches(n: int, num_players: int = 500, seed: int = 0):
+    rng = random.Random(seed)
+    ids = [f"p{i}" for i in range(num_players)]
+    matches = []
+    for _ in range(n):
+        p1, p2, p3, p4 = rng.sample(ids, 4)
+        matches.append(FakeMatch([p1, p2], [p3, p4], rng.randint(0, 7), rng.randint(0, 7)))
+    return matches
+
+
+def legacy_ranking(matches):
+    """Cópia do ciclo anterior (game_day_ranking)"""
+    ranking = defaultdict(lambda: {
+        "games": 0, "wins": 0, "ties": 0, "losses": 0,
+        "points_for": 0, "points_against": 0,
+    })
+
+    for match in matches:
+        a_pts = match.points_team_a
+        b_pts = match.points_team_b
+
+        if a_pts > b_pts:
+            res_a, res_b = "W", "L"
+        elif a_pts < b_pts:
+            res_a, res_b = "L", "W"
+        else:
+            res_a = res_b = "T"
+
+        for pids, res, pf, pa in ((match.team_a_ids, res_a, a_pts, b_pts),
+                                  (match.team_b_ids, res_b, b_pts, a_pts)):
+            for pid in pids:
+                r = ranking[pid]
+                r["games"] += 1
+                r["points_for"] += pf
+                r["points_against"] += pa
+                if res == "W": r["wins"] += 1
+                elif res == "T": r["ties"] += 1
+                else: r["losses"] += 1
+
+    ranking_list = []
+    for pid, r in ranking.items():
+        games = r["games"]
+        win_rate = (r["wins"] / games * 100) if games else 0
+        ranking_list.append({**r, "points": r["points_for"], "win_rate": round(win_rate, 1)})
+
+    ranking_list.sort(key=lambda x: (x["points"], x["win_rate"]), reverse=True)
+    return ranking_list
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'jogos':>10} {'legacy ms':>10} {'batch ms':>10} {'engine ms':>10} {'total ms':>10} {'total/legacy':>13}")
+    for n in args.sizes:
+        matches = make_matches(n)
+
+        legacy, legacy_ms = timed(legacy_ranking, matches)
+        batch, batch_ms = timed(MatchBatch.from_matches, matches)
+        engine, engine_ms = timed(lambda b: rank(compute_standings(b)), batch)
+
+        assert [r["points"] for r in legacy] == [r["points"] for r in engine]
+        total_ms = batch_ms + engine_ms
+        print(f"{n:>10} {legacy_ms:>10.1f} {batch_ms:>10.1f} {engine_ms:>10.1f} {total_ms:>10.1f}"
+              f" {total_ms / legacy_ms:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
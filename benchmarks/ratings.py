@@ -0,0 +1,165 @@
+"""Benchmark do motor de ratings (rating_service): reconstrução completa vs
+atualização incremental de um resultado, sobre uma história longa em SQLite.
+
+    python -m benchmarks.ratings [--matches 100000] [--repeat 20]
+
+A atualização incremental mede o caminho real de um "Guardar" (update_scores,
+que faz o replay a partir do dia alterado) para um jogo do último dia e de dias
+progressivamente mais antigos. No fim confirma que o replay incremental dá os
+mesmos ratings que a reconstrução completa.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta
+from time import perf_counter
+
+from sqlalchemy import insert, select
+
+from app.models.competition import Competition
+from app.models.game_day import GameDay
+from app.models.match import Match, MatchPlayer
+from app.models.player import Player
+from app.models.rating import PlayerRating
+from app.services import rating_service
+from app.services.match_service import update_scores
+from benchmarks.common import make_engine, make_sessionmaker
+
+COURTS = 4
+ROUNDS = 7
+DAYS_PER_COMPETITION = 50
+INSERT_BATCH = 10000
+
+
+def seed_history(db, num_matches: int, num_players: int = 500, seed: int = 0) -> list[str]:
+    """História com num_matches jogos (COURTS x ROUNDS por dia); devolve os dias por ordem"""
+    rng = random.Random(seed)
+    new_id = lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    player_ids = [new_id() for _ in range(num_players)]
+    db.execute(insert(Player), [
+        {"id": pid, "name": f"Jogador {i:05d}", "data_nascimento": date(1990, 1, 1)}
+        for i, pid in enumerate(player_ids)
+    ])
+
+    num_days = -(-num_matches // (COURTS * ROUNDS))
+    days, matches, teams = [], [], []
+    competition_id = None
+    for d in range(num_days):
+        day = date(2000, 1, 1) + timedelta(days=2 * d)
+        if d % DAYS_PER_COMPETITION == 0:
+            competition_id = new_id()
+            db.execute(insert(Competition), [{
+                "id": competition_id, "name": f"Liga {d // DAYS_PER_COMPETITION:04d}",
+                "start_date": day, "end_date": day + timedelta(days=2 * DAYS_PER_COMPETITION),
+            }])
+        day_id = new_id()
+        db.execute(insert(GameDay), [{
+            "id": day_id, "competition_id": competition_id, "date": day, "num_courts": COURTS
+        }])
+        days.append(day_id)
+
+        enrolled = rng.sample(player_ids, COURTS * 4)
+        for order in range(1, ROUNDS + 1):
+            rng.shuffle(enrolled)
+            for court in range(COURTS):
+                match_id = new_id()
+                matches.append({
+                    "id": match_id, "game_day_id": day_id, "order": order, "court": court + 1,
+                    "scheduled_at": datetime.combine(day, datetime.min.time()),
+                    "points_team_a": rng.randint(0, 7), "points_team_b": rng.randint(0, 7),
+                })
+                for i, pid in enumerate(enrolled[court * 4:court * 4 + 4]):
+                    teams.append({
+                        "match_id": match_id, "player_id": pid, "team": "AB"[i // 2],
+                        "date": day, "game_day_id": day_id, "order": order, "court": court + 1,
+                    })
+
+        if len(matches) >= INSERT_BATCH:
+            db.execute(insert(Match), matches)
+            db.execute(insert(MatchPlayer), teams)
+            matches, teams = [], []
+
+    if matches:
+        db.execute(insert(Match), matches)
+        db.execute(insert(MatchPlayer), teams)
+    db.commit()
+    return days
+
+
+def timed_update(Session, game_day_id: str, repeat: int) -> tuple:
+    """Mediana (ms) de update_scores num jogo do dia e nº de linhas de rating reescritas"""
+    timings, rows = [], 0
+    for i in range(repeat):
+        db = Session()
+        match = db.query(Match).filter(Match.game_day_id == game_day_id).first()
+        new = ((match.points_team_a + 1 + i) % 8, match.points_team_b)
+
+        start = perf_counter()
+        update_scores(db, game_day_id, {match.id: new})
+        timings.append((perf_counter() - start) * 1000)
+        rows = db.query(PlayerRating).filter(
+            PlayerRating.date >= select(GameDay.date).where(GameDay.id == game_day_id).scalar_subquery()
+        ).count()
+
+        db.rollback()
+        db.close()
+    return statistics.median(timings), rows
+
+
+def snapshot(db) -> dict:
+    return {
+        (pid, gid): (round(rating, 6), round(rd, 6), games)
+        for pid, gid, rating, rd, games in db.query(
+            PlayerRating.player_id, PlayerRating.game_day_id,
+            PlayerRating.rating, PlayerRating.rd, PlayerRating.games
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'ratings.db')}")
+        Session = make_sessionmaker(engine)
+
+        db = Session()
+        start = perf_counter()
+        days = seed_history(db, args.matches)
+        print(f"História: {args.matches} jogos em {len(days)} dias ({perf_counter() - start:.1f} s)")
+
+        start = perf_counter()
+        total = rating_service.rebuild(db)
+        db.commit()
+        print(f"Reconstrução completa: {perf_counter() - start:.2f} s ({total} linhas)\n")
+        db.close()
+
+        print(f"{'dia alterado':<22}{'update_scores':>15}{'linhas reescritas':>20}")
+        for label, position in (("último", 1), ("5 dias antes", 5), ("50 dias antes", 50),
+                                ("a meio da história", len(days) // 2)):
+            ms, rows = timed_update(Session, days[-position], args.repeat)
+            print(f"{label:<22}{ms:>12.1f} ms{rows:>20}")
+
+        # o replay incremental tem de coincidir com a reconstrução completa
+        db = Session()
+        match = db.query(Match).filter(Match.game_day_id == days[len(days) // 3]).first()
+        update_scores(db, match.game_day_id, {match.id: (7, 0)})
+        incremental = snapshot(db)
+        rating_service.rebuild(db)
+        full = snapshot(db)
+        db.rollback()
+        db.close()
+        engine.dispose()
+
+    print("\nIncremental == reconstrução completa:", incremental == full)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Verifica o encaminhamento primário/réplica (DATABASE_REPLICA_URL) localmente,
+com dois ficheiros SQLite: a réplica é uma cópia do primário que não recebe
+as escritas seguintes, o que torna visível de onde vem cada leitura.
+
+    python -m benchmarks.replica_routing
+
+Corre a aplicação completa (app.main, com lifespan e middlewares) e confirma:
+  - as páginas de leitura usam a réplica;
+  - o POST e a página do redirect 303 que se lhe segue usam o primário;
+  - sem o cookie de escrita, as leituras voltam à réplica;
+  - com a réplica em baixo, as leituras vão para o primário e voltam à
+    réplica passados DB_REPLICA_RETRY segundos.
+Falha com código de saída 1.
+"""
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import database
+from app.models.match import Match
+from benchmarks.common import make_engine, make_sessionmaker, seed_tournament
+
+RETRY = 0.5
+
+
+class EngineCounter:
+    """Nº de instruções SQL executadas em cada base de dados desde o último reset()"""
+
+    def __init__(self, **engines):
+        self.counts = dict.fromkeys(engines, 0)
+        for name, group in engines.items():
+            for engine in group:
+                if engine is not None:
+                    event.listen(engine, "before_cursor_execute", self._listener(name))
+
+    def _listener(self, name):
+        def on_execute(*args):
+            self.counts[name] += 1
+        return on_execute
+
+    def reset(self):
+        for name in self.counts:
+            self.counts[name] = 0
+
+    def served_by(self) -> str:
+        used = [name for name, count in self.counts.items() if count]
+        self.reset()
+        return "+".join(used) or "-"
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    replica_dir = os.path.join(tmp, "replica")
+    os.mkdir(replica_dir)
+    primary_path = os.path.join(tmp, "primary.db")
+    replica_path = os.path.join(replica_dir, "replica.db")
+
+    engine = make_engine(f"sqlite:///{primary_path}")
+    db = make_sessionmaker(engine)()
+    data = seed_tournament(db, num_players=20, num_competitions=1, game_days=2)
+    match = db.query(Match).filter(Match.game_day_id == data["game_days"][0]).first()
+    match_id, day_id, points_a = match.id, match.game_day_id, match.points_team_a
+    db.close()
+    engine.dispose()
+    shutil.copy(primary_path, replica_path)
+
+    database.DATABASE_URL = f"sqlite:///{primary_path}"
+    database.DATABASE_REPLICA_URL = f"sqlite:///{replica_path}"
+    database.DB_REPLICA_RETRY = RETRY
+
+    from app.main import app
+
+    checks = []
+
+    def check(name, served_by, expected, ok=True):
+        passed = served_by == expected and ok
+        checks.append(passed)
+        print(f"  {'✅' if passed else '❌'} {name:<48} {served_by} (esperado: {expected})")
+
+    ranking = f"/competitions/{data['competitions'][0]}/ranking"
+    matches = f"/matches/{day_id}/matches"
+    new_score = (points_a + 1) % 8
+
+    with TestClient(app) as client:
+        # com DB_ASYNC=1 as leituras passam pelos engines assíncronos
+        counter = EngineCounter(
+            primary=(database.engine, database.async_engine and database.async_engine.sync_engine),
+            replica=(database.replica_engine,
+                     database.async_replica_engine and database.async_replica_engine.sync_engine),
+        )
+
+        client.get(ranking)
+        check("GET ranking", counter.served_by(), "replica")
+
+        response = client.post(
+            f"/matches/update-score/{match_id}",
+            data={"points_team_a": new_score, "points_team_b": 0},
+            follow_redirects=False,
+        )
+        check("POST update-score", counter.served_by(), "primary", response.status_code == 303)
+
+        response = client.get(response.headers["location"])
+        fresh = re.search(rf'name="points_team_a_{match_id}"\s+value="{new_score}"', response.text)
+        check("GET do redirect 303 (mostra o novo resultado)", counter.served_by(), "primary",
+              fresh is not None)
+
+        client.cookies.clear()
+        client.get(matches)
+        check("GET sem o cookie de escrita", counter.served_by(), "replica")
+
+        # réplica em baixo: o ficheiro deixa de estar acessível e o pool é reiniciado
+        os.rename(replica_dir, replica_dir + "-down")
+        database.replica_engine.dispose()
+        if database.async_replica_engine is not None:
+            client.portal.call(database.async_replica_engine.dispose)
+        response = client.get(ranking)
+        check("GET com a réplica em baixo", counter.served_by(), "primary",
+              response.status_code == 200 and not database.replica_available())
+        client.get(ranking)
+        check("GET seguinte (réplica ainda em pausa)", counter.served_by(), "primary")
+
+        os.rename(replica_dir + "-down", replica_dir)
+        time.sleep(RETRY)
+        client.get(ranking)
+        check(f"GET passados {RETRY} s (réplica de volta)", counter.served_by(), "replica")
+
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    if not all(checks):
+        print(f"\n{checks.count(False)} verificação(ões) falharam")
+        sys.exit(1)
+    print("\nEncaminhamento primário/réplica correto")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""Benchmark de todas as rotas HTML (home, competições, dias de jogo, jogos,
+jogadores), em processo, sobre dados sintéticos reprodutíveis em SQLite.
+
+    python -m benchmarks.routes [--sizes small,medium] [--iterations 20]
+                                [--output bench.json] [--compare anterior.json]
+
+Para cada tamanho de dados reporta p50/p95 da latência e o nº de queries SQL por
+rota, e grava tudo em JSON (com o commit atual) para comparar entre commits.
+Por omissão as caches de HTML e da lista de jogadores são limpas antes de cada
+pedido (mede-se o render completo); --warm-caches mantém-nas.
+
+O stream /matches/{id}/live não é medido (é uma ligação que não termina).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from time import perf_counter
+
+import sqlalchemy
+from sqlalchemy import func
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from fastapi.testclient import TestClient
+
+from app.database import get_db, get_read_db
+from app.models.competition import Competition
+from app.models.game_day import GameDay
+from app.models.match import Match, MatchPlayer
+from app.models.player import Player
+from app.routers import (
+    home_router, competition_router, game_day_router, match_router, player_router
+)
+from app.services import cache_service, export_service
+from app.services.match_service import delete_by_game_day
+from app.services.player_service import invalidate_roster
+from benchmarks.common import QueryCounter, make_engine, make_sessionmaker, seed_tournament
+
+SIZES = {
+    "small": dict(num_players=40, num_competitions=2, game_days=4, num_courts=2),
+    "medium": dict(num_players=200, num_competitions=4, game_days=12, num_courts=3),
+    "large": dict(num_players=1000, num_competitions=8, game_days=30, num_courts=4),
+}
+
+# Regressão assinalada no --compare quando o p50 piora mais do que isto
+REGRESSION_RATIO = 1.2
+
+
+class Context:
+    """Dados gerados + ids de rascunho para as rotas que escrevem"""
+
+    def __init__(self, client, Session, data):
+        self.client = client
+        self.Session = Session
+        self.data = data
+        self.counter = 0
+
+        self.competition = data["competitions"][0]
+        self.day = data["game_days"][0]
+        db = Session()
+        self.match_ids = [
+            mid for mid, in db.query(Match.id).filter(Match.game_day_id == self.day)
+        ]
+        # jogador com mais jogos, para o histórico (/players/{id})
+        self.veteran = db.query(MatchPlayer.player_id).group_by(MatchPlayer.player_id).order_by(
+            func.count().desc(), MatchPlayer.player_id
+        ).limit(1).scalar()
+        db.close()
+
+        # competição de rascunho para criar/alterar dias sem mexer nos dados medidos
+        self.scratch = self.new_competition()
+        self.scratch_day = self.new_empty_day()
+        self.enroll(data["players"][:8])
+        self.export_csv = client.get(f"/game-days/{self.day}/export").content
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix} {self.counter:06d}"
+
+    def new_competition(self) -> str:
+        name = self.unique("Rascunho")
+        self.client.post("/competitions/new", data={
+            "name": name, "start_date": "2030-01-01", "end_date": "2030-12-31"
+        })
+        return self._scalar(Competition.id, Competition.name == name)
+
+    def new_empty_day(self) -> str:
+        group = self.unique("G")
+        self.client.post(f"/game-days/new/{self.scratch}", data={
+            "date": "2030-06-01", "num_courts": 2, "group_name": group
+        })
+        return self._scalar(GameDay.id, GameDay.group_name == group)
+
+    def new_player(self) -> str:
+        name = self.unique("Temp")
+        self.client.post("/players/new", data={
+            "name": name, "sexo": "M", "nivel": "M3", "data_nascimento": "1990-01-01"
+        })
+        return self._scalar(Player.id, Player.name == name)
+
+    def enroll(self, player_ids):
+        self.clear_matches()
+        self.client.post(f"/game-days/update-players/{self.scratch_day}",
+                         data={"player_ids": player_ids})
+
+    def clear_matches(self):
+        db = self.Session()
+        delete_by_game_day(db, self.scratch_day)
+        db.commit()
+        db.close()
+
+    def generate(self):
+        self.clear_matches()
+        self.client.post(f"/game-days/{self.scratch_day}/generate-matches",
+                         data={"mode": "round_robin"})
+
+    def _scalar(self, column, condition):
+        db = self.Session()
+        try:
+            return db.query(column).filter(condition).scalar()
+        finally:
+            db.close()
+
+
+def _player_form(ctx):
+    return {"name": ctx.unique("Novo"), "sexo": "F", "nivel": "F2", "data_nascimento": "1995-05-05"}
+
+
+def _players_csv(ctx):
+    lines = ["Nome;Sexo;Nível;Nascimento"]
+    lines += [f"{ctx.unique('Import')};M;M2;1990-01-01" for _ in range(100)]
+    return {"file": ("players.csv", "\n".join(lines).encode(), "text/csv")}
+
+
+def _score(ctx):
+    ctx.counter += 1
+    return {"points_team_a": ctx.counter % 8, "points_team_b": 3}
+
+
+def _save_all(ctx):
+    ctx.counter += 1
+    return {
+        f"points_team_{t}_{mid}": (ctx.counter + i) % 8
+        for i, mid in enumerate(ctx.match_ids) for t in "ab"
+    }
+
+
+# (nome, método, caminho, form/files, preparação não medida -> dict para formatar o caminho)
+SCENARIOS = [
+    # home_router
+    ("home", "GET", "/", None, None),
+    # competition_router
+    ("competitions.list", "GET", "/competitions/", None, None),
+    ("competitions.new_form", "GET", "/competitions/new", None, None),
+    ("competitions.create", "POST", "/competitions/new",
+     lambda ctx: {"data": {"name": ctx.unique("Liga"), "start_date": "2031-01-01",
+                           "end_date": "2031-12-31"}}, None),
+    ("competitions.edit_form", "GET", "/competitions/edit/{competition}", None, None),
+    ("competitions.update", "POST", "/competitions/edit/{scratch}",
+     lambda ctx: {"data": {"name": "Rascunho", "start_date": "2030-01-01",
+                           "end_date": "2030-12-31", "status": "Em curso"}}, None),
+    ("competitions.ranking", "GET", "/competitions/{competition}/ranking", None, None),
+    ("competitions.export_csv", "GET", "/competitions/{competition}/export?format=csv", None, None),
+    ("competitions.export_xlsx", "GET", "/competitions/{competition}/export?format=xlsx", None, None),
+    # game_day_router
+    ("game_days.list", "GET", "/game-days/competition/{competition}", None, None),
+    ("game_days.ranking", "GET", "/game-days/{day}/ranking", None, None),
+    ("game_days.export_csv", "GET", "/game-days/{day}/export", None, None),
+    ("game_days.new_form", "GET", "/game-days/new/{scratch}", None, None),
+    ("game_days.create", "POST", "/game-days/new/{scratch}",
+     lambda ctx: {"data": {"date": "2030-07-01", "num_courts": 2, "group_name": ctx.unique("G")}},
+     None),
+    ("game_days.update_fields", "POST", "/game-days/update-fields/{scratch_day}",
+     lambda ctx: {"data": {"num_courts": 2}}, None),
+    ("game_days.update_players", "POST", "/game-days/update-players/{scratch_day}",
+     lambda ctx: {"data": {"player_ids": ctx.data["players"][:8]}},
+     lambda ctx: ctx.clear_matches()),
+    ("game_days.add_player", "POST", "/game-days/add-player/{scratch_day}",
+     lambda ctx: {"data": {"player_id": ctx.data["players"][8]}}, None),
+    ("game_days.remove_player", "POST", "/game-days/remove-player/{scratch_day}",
+     lambda ctx: {"data": {"player_id": ctx.data["players"][8]}}, None),
+    ("game_days.replace_player", "POST", "/game-days/replace-player/{scratch_day}",
+     lambda ctx: {"data": {"old_player_id": ctx.data["players"][7],
+                           "new_player_id": ctx.data["players"][9]}},
+     lambda ctx: ctx.enroll(ctx.data["players"][:8])),
+    ("game_days.preview_round_robin", "GET",
+     "/game-days/{scratch_day}/generate-matches/preview?mode=round_robin", None,
+     lambda ctx: ctx.clear_matches()),
+    ("game_days.preview_mixer", "GET",
+     "/game-days/{scratch_day}/generate-matches/preview?mode=mixer&seed=1", None,
+     lambda ctx: ctx.clear_matches()),
+    ("game_days.generate", "POST", "/game-days/{scratch_day}/generate-matches",
+     lambda ctx: {"data": {"mode": "round_robin"}},
+     lambda ctx: ctx.clear_matches()),
+    ("game_days.delete_matches", "POST", "/game-days/{scratch_day}/delete-matches", None,
+     lambda ctx: ctx.generate()),
+    ("game_days.import", "POST", "/game-days/competition/{target}/import",
+     lambda ctx: {"files": {"file": ("jogos.csv", ctx.export_csv, "text/csv")}},
+     lambda ctx: {"target": ctx.new_competition()}),
+    ("game_days.delete", "POST", "/game-days/delete/{target}", None,
+     lambda ctx: {"target": ctx.new_empty_day()}),
+    # match_router
+    ("matches.view", "GET", "/matches/{day}/matches", None, None),
+    ("matches.update_score", "POST", "/matches/update-score/{match}",
+     lambda ctx: {"data": _score(ctx)}, None),
+    ("matches.save_all", "POST", "/matches/save-all/{day}",
+     lambda ctx: {"data": _save_all(ctx)}, None),
+    # player_router
+    ("players.list", "GET", "/players/", None, None),
+    ("players.new_form", "GET", "/players/new", None, None),
+    ("players.history", "GET", "/players/{veteran}", None, None),
+    ("players.create", "POST", "/players/new", lambda ctx: {"data": _player_form(ctx)}, None),
+    ("players.import", "POST", "/players/import", lambda ctx: {"files": _players_csv(ctx)}, None),
+    ("players.edit_form", "GET", "/players/edit/{player}", None, None),
+    ("players.update", "POST", "/players/edit/{player}",
+     lambda ctx: {"data": {"name": "Jogador 00000", "sexo": "M", "nivel": "M1",
+                           "data_nascimento": "1980-01-01"}}, None),
+    ("players.delete", "POST", "/players/delete/{target}", None,
+     lambda ctx: {"target": ctx.new_player()}),
+]
+
+
+def build_app(Session):
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.mount("/static", StaticFiles(directory="app/static"), name="static")
+    for module in (home_router, competition_router, game_day_router, match_router, player_router):
+        app.include_router(module.router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    return app
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def run_size(name: str, iterations: int, warm_caches: bool, seed: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Session = make_sessionmaker(engine)
+
+        db = Session()
+        start = perf_counter()
+        data = seed_tournament(db, seed=seed, **SIZES[name])
+        seed_seconds = perf_counter() - start
+        db.close()
+
+        # o export abre a sua própria sessão (fora da dependência get_db)
+        export_service.SessionLocal = Session
+        client = TestClient(build_app(Session))
+        ctx = Context(client, Session, data)
+        base = {
+            "competition": ctx.competition, "day": ctx.day, "match": ctx.match_ids[0],
+            "player": data["players"][0], "veteran": ctx.veteran,
+            "scratch": ctx.scratch, "scratch_day": ctx.scratch_day,
+        }
+
+        routes = {}
+        for route, method, path, request_args, setup in SCENARIOS:
+            timings, queries = [], []
+            for _ in range(iterations):
+                params = dict(base)
+                extra = setup(ctx) if setup else None
+                if isinstance(extra, dict):
+                    params.update(extra)
+                kwargs = request_args(ctx) if request_args else {}
+                if not warm_caches:
+                    cache_service.clear_html_cache()
+                    invalidate_roster()
+
+                url = path.format(**params)
+                with QueryCounter(engine) as counter:
+                    t0 = perf_counter()
+                    response = client.request(method, url, follow_redirects=False, **kwargs)
+                    elapsed = perf_counter() - t0
+
+                if response.status_code >= 400:
+                    raise RuntimeError(f"{route}: {method} {url} -> {response.status_code}")
+                timings.append(elapsed * 1000)
+                queries.append(counter.count)
+
+            routes[route] = {
+                "method": method,
+                "path": path,
+                "p50_ms": round(statistics.median(timings), 3),
+                "p95_ms": round(percentile(timings, 0.95), 3),
+                "queries": int(statistics.median(queries)),
+                "queries_max": max(queries),
+            }
+            print(f"  {route:<32} p50 {routes[route]['p50_ms']:>9.2f} ms   "
+                  f"p95 {routes[route]['p95_ms']:>9.2f} ms   {routes[route]['queries']:>4} queries")
+
+        engine.dispose()
+        return {"data": data["counts"], "seed_seconds": round(seed_seconds, 3), "routes": routes}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old: dict, new: dict) -> bool:
+    """Mostra as diferenças para um resultado anterior; True se houver regressões"""
+    regressions = False
+    print(f"\nComparação com {old.get('commit')} ({old.get('created_at')})")
+    for size, result in new["results"].items():
+        previous = old.get("results", {}).get(size)
+        if not previous:
+            continue
+        for route, stats in result["routes"].items():
+            before = previous["routes"].get(route)
+            if not before:
+                continue
+            ratio = stats["p50_ms"] / before["p50_ms"] if before["p50_ms"] else 1
+            more_queries = stats["queries"] - before["queries"]
+            flag = ratio > REGRESSION_RATIO or more_queries > 0
+            regressions |= flag
+            if flag or ratio < 1 / REGRESSION_RATIO or more_queries < 0:
+                print(f"  {'⚠️' if flag else '✅'} {size:<7} {route:<32} "
+                      f"p50 x{ratio:.2f}   queries {before['queries']} -> {stats['queries']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="small,medium", help=f"de {', '.join(SIZES)}")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warm-caches", action="store_true")
+    parser.add_argument("--output", default=None, help="ficheiro JSON (por omissão bench-<commit>.json)")
+    parser.add_argument("--compare", default=None, help="JSON de uma execução anterior")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = {}
+    for size in args.sizes.split(","):
+        print(f"{size}: {SIZES[size]}")
+        results[size] = run_size(size, args.iterations, args.warm_caches, args.seed)
+
+    report = {
+        "commit": commit,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "iterations": args.iterations,
+        "seed": args.seed,
+        "warm_caches": args.warm_caches,
+        "results": results,
+    }
+
+    output = args.output or f"bench-{commit or 'local'}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            if compare(json.load(f), report):
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()